@@ -0,0 +1,284 @@
+"""Formato binario para guardar y cargar mapas.
+
+El archivo tiene un encabezado de TAM_ENCABEZADO bytes (ver ENCABEZADO):
+
+    * MAGICO (4 bytes)
+    * versión del formato (2 bytes) y opciones (2 bytes, ver CON_COSTOS)
+    * filas, columnas (4 bytes cada uno)
+    * fila y columna del origen, fila y columna del destino (4 bytes cada uno)
+
+seguido de las filas del mapa, una detrás de otra. Cada fila ocupa
+``(columnas + 7) // 8`` bytes, con un bit por celda (1 = bloqueada): la celda
+de la columna ``c`` es el bit ``c % 8`` del byte ``c // 8`` de la fila.
+Si las opciones incluyen CON_COSTOS, después de las filas viene el costo de
+cada celda (ver Mapa.costo): un byte por celda, en el orden de Mapa.celdas.
+Todos los enteros son little-endian.
+
+La versión 1 del formato no tenía opciones (siempre 0); se sigue pudiendo
+leer.
+"""
+import mmap
+import struct
+from mapa import Coord, Mapa
+
+MAGICO = b'LAB3'
+VERSION = 2
+VERSIONES_SOPORTADAS = (1, 2)
+# Opciones del encabezado
+CON_COSTOS = 1
+ENCABEZADO = struct.Struct('<4sHHIIIIII')
+TAM_ENCABEZADO = ENCABEZADO.size
+
+# Para convertir celdas (bytes 0/1) en dígitos binarios ('0'/'1') y viceversa.
+_A_DIGITOS = bytes.maketrans(b'\x00\x01', b'01')
+_A_CELDAS = bytes.maketrans(b'01', b'\x00\x01')
+
+def bytes_por_fila(columnas):
+    return (columnas + 7) // 8
+
+def empaquetar_fila(celdas):
+    """Empaqueta una fila de celdas (bytes con 0 o 1 por celda) en un bit por
+    celda.
+
+    Devuelve:
+        bytes: La fila empaquetada, de bytes_por_fila(len(celdas)) bytes
+    """
+    if not celdas:
+        return b''
+    return int(bytes(celdas).translate(_A_DIGITOS)[::-1], 2).to_bytes(bytes_por_fila(len(celdas)), 'little')
+
+def desempaquetar_fila(datos, columnas):
+    """Inversa de empaquetar_fila.
+
+    Devuelve:
+        bytes: Un byte (0 o 1) por celda de la fila
+    """
+    bits = int.from_bytes(datos, 'little')
+    return format(bits, f'0{len(datos) * 8}b')[::-1][:columnas].encode().translate(_A_CELDAS)
+
+def leer_encabezado(datos):
+    """Lee el encabezado de un archivo de mapa.
+
+    Argumentos:
+        datos (bytes): Los primeros TAM_ENCABEZADO bytes del archivo
+
+    Devuelve:
+        (int, int, Coord, Coord, int): filas, columnas, origen, destino y
+                                       opciones (ver CON_COSTOS)
+    """
+    if len(datos) < TAM_ENCABEZADO:
+        raise ValueError('archivo de mapa incompleto')
+    magico, version, opciones, filas, columnas, fo, co, fd, cd = ENCABEZADO.unpack(datos[:TAM_ENCABEZADO])
+    if magico != MAGICO:
+        raise ValueError('no es un archivo de mapa')
+    if version not in VERSIONES_SOPORTADAS:
+        raise ValueError(f'versión de archivo de mapa no soportada: {version}')
+    return filas, columnas, Coord(fo, co), Coord(fd, cd), opciones
+
+def validar_costos(costos):
+    if 0 in costos:
+        raise ValueError('costo inválido en el archivo de mapa: 0')
+
+class EscritorMapa:
+    """
+    Escribe un archivo de mapa fila por fila, sin tener el mapa entero en
+    memoria.
+
+    Ejemplo:
+        >>> with EscritorMapa('mapa.lab', 3, 4) as escritor:
+        ...     escritor.escribir_fila(b'\\x01\\x01\\x01\\x01')
+        ...     escritor.escribir_fila(b'\\x01\\x00\\x00\\x01')
+        ...     escritor.escribir_fila(b'\\x01\\x01\\x01\\x01')
+
+    Si el mapa tiene costos, se escriben con escribir_costos después de la
+    última fila.
+    """
+
+    def __init__(self, ruta, filas, columnas, origen=None, destino=None):
+        """Constructor.
+
+        Argumentos:
+            ruta (str): Ruta del archivo a escribir
+            filas, columnas (int): Tamaño del mapa
+            origen, destino (Coord|None): Celdas origen y destino (por
+                defecto, las mismas que las de Mapa). Se pueden cambiar hasta
+                que se cierra el archivo.
+        """
+        self.archivo = open(ruta, 'wb')
+        self.filas = filas
+        self.columnas = columnas
+        self.origen = origen or Coord()
+        self.destino = destino or Coord(filas - 1, columnas - 1)
+        self.filas_escritas = 0
+        self.opciones = 0
+        self.escribir_encabezado()
+
+    def escribir_encabezado(self):
+        self.archivo.seek(0)
+        self.archivo.write(ENCABEZADO.pack(MAGICO, VERSION, self.opciones, self.filas, self.columnas,
+                                           self.origen.fila, self.origen.columna,
+                                           self.destino.fila, self.destino.columna))
+
+    def escribir_fila(self, celdas):
+        """Escribe la siguiente fila del mapa.
+
+        Argumentos:
+            celdas (bytes|bytearray): Un byte por celda, 1 si está bloqueada
+        """
+        if len(celdas) != self.columnas:
+            raise ValueError(f'se esperaban {self.columnas} celdas, no {len(celdas)}')
+        if self.filas_escritas == self.filas:
+            raise ValueError('ya se escribieron todas las filas')
+        self.archivo.seek(0, 2)
+        self.archivo.write(empaquetar_fila(celdas))
+        self.filas_escritas += 1
+
+    def escribir_costos(self, costos):
+        """Escribe los costos de las celdas, después de la última fila.
+
+        Argumentos:
+            costos (bytes|bytearray): El costo de cada celda (entre 1 y
+                COSTO_MAXIMO), indexado como Mapa.celdas
+        """
+        if len(costos) != self.filas * self.columnas:
+            raise ValueError(f'se esperaban {self.filas * self.columnas} costos, no {len(costos)}')
+        if self.filas_escritas < self.filas:
+            raise ValueError('faltan escribir filas')
+        if self.opciones & CON_COSTOS:
+            raise ValueError('ya se escribieron los costos')
+        validar_costos(costos)
+        self.archivo.seek(0, 2)
+        self.archivo.write(costos)
+        self.opciones |= CON_COSTOS
+
+    def cerrar(self):
+        """Cierra el archivo. Si faltan filas, se completan como bloqueadas."""
+        if self.archivo.closed:
+            return
+        while self.filas_escritas < self.filas:
+            self.escribir_fila(b'\x01' * self.columnas)
+        self.escribir_encabezado()
+        self.archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+def guardar_mapa(mapa, ruta):
+    """Guarda un mapa en un archivo.
+
+    Argumentos:
+        mapa (Mapa): El mapa a guardar
+        ruta (str): Ruta del archivo
+    """
+    filas, columnas = mapa.dimension()
+    with EscritorMapa(ruta, filas, columnas, mapa.origen(), mapa.destino()) as escritor:
+        for f in range(filas):
+            escritor.escribir_fila(mapa.celdas[f * columnas:(f + 1) * columnas])
+        if mapa.costos is not None:
+            escritor.escribir_costos(mapa.costos)
+
+def cargar_mapa(ruta):
+    """Carga un archivo de mapa entero en memoria.
+
+    Devuelve:
+        Mapa: Un mapa nuevo (modificable) con el contenido del archivo
+    """
+    with open(ruta, 'rb') as archivo:
+        filas, columnas, origen, destino, opciones = leer_encabezado(archivo.read(TAM_ENCABEZADO))
+        mapa = Mapa(filas, columnas)
+        mapa.asignar_origen(origen)
+        mapa.asignar_destino(destino)
+        tam_fila = bytes_por_fila(columnas)
+        for f in range(filas):
+            datos = archivo.read(tam_fila)
+            if len(datos) < tam_fila:
+                raise ValueError('archivo de mapa incompleto')
+            mapa.celdas[f * columnas:(f + 1) * columnas] = desempaquetar_fila(datos, columnas)
+        if opciones & CON_COSTOS:
+            costos = archivo.read(filas * columnas)
+            if len(costos) < filas * columnas:
+                raise ValueError('archivo de mapa incompleto')
+            validar_costos(costos)
+            mapa.costos = bytearray(costos)
+    return mapa
+
+def abrir_mapa(ruta):
+    """Abre un archivo de mapa sin cargarlo en memoria (ver MapaArchivo).
+
+    Devuelve:
+        MapaArchivo: El mapa, de sólo lectura
+    """
+    return MapaArchivo(ruta)
+
+class _BitsArchivo:
+    '''Vista de sólo lectura de las celdas de un archivo de mapa, indexada como
+    Mapa.celdas (un valor 0 o 1 por índice de celda).'''
+    def __init__(self, datos, columnas, n):
+        self.datos = datos
+        self.columnas = columnas
+        self.tam_fila = bytes_por_fila(columnas)
+        self.n = n
+    def __len__(self):
+        return self.n
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.rango(*i.indices(self.n))
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        f, c = divmod(i, self.columnas)
+        return (self.datos[TAM_ENCABEZADO + f * self.tam_fila + (c >> 3)] >> (c & 7)) & 1
+    def rango(self, desde, hasta, paso):
+        celdas = bytearray()
+        i = desde
+        while i < hasta:
+            f, c = divmod(i, self.columnas)
+            inicio = TAM_ENCABEZADO + f * self.tam_fila
+            fila = desempaquetar_fila(self.datos[inicio:inicio + self.tam_fila], self.columnas)
+            celdas += fila[c:min(self.columnas, c + hasta - i)]
+            i = (f + 1) * self.columnas
+        return bytes(celdas[::paso])
+
+class MapaArchivo(Mapa):
+    """
+    Mapa de sólo lectura leído directamente de un archivo con mmap.
+
+    Abrirlo no lee el archivo: cada celda se lee (y el sistema operativo la
+    trae a memoria) recién cuando se consulta, así que sirve para mapas más
+    grandes que la memoria disponible. Tiene la misma interfaz de lectura
+    que Mapa; los métodos que modifican el mapa no están soportados.
+    """
+
+    def __init__(self, ruta):
+        """Constructor.
+
+        Argumentos:
+            ruta (str): Ruta del archivo de mapa
+        """
+        with open(ruta, 'rb') as archivo:
+            self.datos = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        filas, columnas, origen, destino, opciones = leer_encabezado(self.datos)
+        self._iniciar(filas, columnas, origen, destino)
+        n = filas * columnas
+        fin_filas = TAM_ENCABEZADO + filas * bytes_por_fila(columnas)
+        fin = fin_filas + (n if opciones & CON_COSTOS else 0)
+        if len(self.datos) < fin:
+            raise ValueError('archivo de mapa incompleto')
+        self.celdas = _BitsArchivo(self.datos, columnas, n)
+        if opciones & CON_COSTOS:
+            if self.datos.find(b'\x00', fin_filas, fin) != -1:
+                raise ValueError('costo inválido en el archivo de mapa: 0')
+            # Vista de sólo lectura: tampoco se cargan en memoria
+            self.costos = memoryview(self.datos)[fin_filas:fin]
+
+    def desplazamientos_vecinos(self, i):
+        # Sin índice de vecinas (sería recorrer todo el archivo): se calculan
+        # leyendo sólo las celdas vecinas
+        return self.desplazamientos[self.calcular_vecindad(i)]
+
+    def cerrar(self):
+        if self.costos is not None:
+            self.costos.release()
+        self.datos.close()
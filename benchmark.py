@@ -0,0 +1,257 @@
+"""Benchmarks de generación, resolución (con y sin costos), carreras, iteración
+del mapa y dibujo.
+
+Ejemplo:
+    $ python benchmark.py --guardar base.json
+    $ python benchmark.py --comparar base.json --umbral 0.2
+    $ python benchmark.py 101x101 501x501 --solo generacion vista
+
+Cada benchmark se corre sobre una escalera de tamaños con semillas fijas, y
+mide el tiempo (el mínimo de varias repeticiones), la memoria pico (con
+tracemalloc, en una corrida aparte) y una cantidad de operaciones propia de
+cada benchmark. Con --comparar, el programa termina con código 1 si algún
+tiempo o memoria empeoró más que el umbral.
+
+El benchmark de dibujo usa VistaSinTk, que reemplaza el canvas de Tk por uno
+que sólo cuenta operaciones, así que no hace falta una pantalla.
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from random import Random
+from mapa import Mapa
+from laberinto import generar_laberinto, filas_eller
+from ia import IA, BFS, Dijkstra
+from carrera import Carrera, agentes_por_defecto
+from lote import tamano
+from tp3 import Vista, Color, Pertenencia
+
+TAMANOS = [(21, 31), (101, 101), (501, 501), (2001, 2001)]
+SEMILLA = 1
+# Pasos de la IA (y cuadros dibujados) en el benchmark de dibujo.
+CUADROS_VISTA = 50
+# Pasos por tick de cada agente en el benchmark de carreras.
+PASOS_CARRERA = 100
+
+def bench_generacion(filas, columnas):
+    """Genera un laberinto. Operaciones: celdas desbloqueadas."""
+    mapa = generar_laberinto(filas, columnas, SEMILLA)
+    return mapa.celdas.count(0)
+
+def bench_eller(filas, columnas):
+    """Genera un laberinto con el algoritmo de Eller, fila por fila y sin
+    guardarlo. Operaciones: filas generadas."""
+    n = 0
+    for _ in filas_eller(filas, columnas, SEMILLA):
+        n += 1
+    return n
+
+def bench_ia(filas, columnas):
+    """Resuelve un laberinto con IA, paso a paso. Operaciones: pasos."""
+    mapa = generar_laberinto(filas, columnas, SEMILLA)
+    ia = IA(mapa)
+    ia.resolver()
+    return ia.pasos
+
+def bench_bfs(filas, columnas):
+    """Resuelve un mapa sin paredes con BFS. Operaciones: celdas
+    expandidas."""
+    mapa = Mapa(filas, columnas)
+    bfs = BFS(mapa)
+    bfs.resolver()
+    return bfs.pasos
+
+def bench_dijkstra(filas, columnas):
+    """Resuelve con Dijkstra un mapa sin paredes con costos al azar entre 1
+    y 9 (comparable con bench_bfs). Operaciones: celdas expandidas."""
+    mapa = Mapa(filas, columnas)
+    azar = Random(SEMILLA)
+    mapa.costos = bytearray(azar.choices(range(1, 10), k=filas * columnas))
+    dijkstra = Dijkstra(mapa)
+    dijkstra.resolver()
+    return dijkstra.pasos
+
+def bench_carrera(filas, columnas):
+    """Corre una carrera con los agentes por defecto hasta que terminan
+    todos. Operaciones: pasos de todos los agentes."""
+    mapa = generar_laberinto(filas, columnas, SEMILLA)
+    carrera = Carrera(mapa, agentes_por_defecto(mapa))
+    while not carrera.terminada():
+        carrera.avanzar(PASOS_CARRERA)
+    return sum(agente.pasos for agente in carrera.agentes)
+
+def bench_iteracion(filas, columnas):
+    """Recorre todas las celdas de un mapa. Operaciones: celdas recorridas."""
+    mapa = generar_laberinto(filas, columnas, SEMILLA)
+    n = 0
+    for coord in mapa:
+        mapa.celda_bloqueada(coord)
+        n += 1
+    return n
+
+def bench_vista(filas, columnas):
+    """Dibuja CUADROS_VISTA cuadros del modo IA siguiendo al jugador, como
+    ModoIA. Operaciones: llamadas al canvas."""
+    mapa = generar_laberinto(filas, columnas, SEMILLA)
+    vista = VistaSinTk(mapa)
+    ia = IA(mapa)
+    visitados = Pertenencia(ia.visitada)
+    camino = Pertenencia(ia.en_camino)
+    coords = None
+    for _ in range(CUADROS_VISTA):
+        coord_jugador = ia.coord_jugador()
+        vista.centrar(coord_jugador)
+        vista.actualizar(lambda mapa, coord: Color.backtracking(mapa, coord, coord_jugador, visitados, camino), coords)
+        ia.avanzar()
+        coords = ia.cambios()
+    return vista.operaciones
+
+BENCHMARKS = {
+    'generacion': bench_generacion,
+    'eller': bench_eller,
+    'ia': bench_ia,
+    'bfs': bench_bfs,
+    'dijkstra': bench_dijkstra,
+    'carrera': bench_carrera,
+    'iteracion': bench_iteracion,
+    'vista': bench_vista,
+}
+
+class _ImagenSinTk:
+    def __init__(self, vista, ancho, alto):
+        self.vista = vista
+        self.ancho = ancho
+        self.alto = alto
+    def width(self):
+        return self.ancho
+    def height(self):
+        return self.alto
+    def put(self, datos, to=None):
+        self.vista.operaciones += 1
+
+class VistaSinTk(Vista):
+    """Vista con los métodos del canvas reemplazados por contadores, para
+    medir el dibujo sin Tk ni pantalla."""
+    def __init__(self, mapa, raster=None):
+        self._iniciar(mapa, raster)
+        self.operaciones = 0
+        self.origen_x = self.origen_y = 0
+        self.ultimo_item = 0
+
+    def nueva_imagen(self, ancho, alto):
+        return _ImagenSinTk(self, ancho, alto)
+
+    def copiar_imagen(self, destino, fuente, desde, hasta):
+        self.operaciones += 1
+
+    def _crear(self, *args, **opciones):
+        self.operaciones += 1
+        self.ultimo_item += 1
+        return self.ultimo_item
+    create_rectangle = create_image = _crear
+
+    def _operacion(self, *args, **opciones):
+        self.operaciones += 1
+    itemconfigure = coords = delete = configure = _operacion
+
+    def xview_moveto(self, fraccion):
+        ancho_total = self.mapa.columnas * self.tam_celda
+        self.origen_x = max(0, min(ancho_total - self.ancho, fraccion * ancho_total))
+
+    def yview_moveto(self, fraccion):
+        alto_total = self.mapa.filas * self.tam_celda
+        self.origen_y = max(0, min(alto_total - self.alto, fraccion * alto_total))
+
+    def xview(self, *args):
+        self.xview_moveto(self._vista_movida(args, self.origen_x, self.ancho, self.mapa.columnas))
+
+    def yview(self, *args):
+        self.yview_moveto(self._vista_movida(args, self.origen_y, self.alto, self.mapa.filas))
+
+    def _vista_movida(self, args, origen, lado, celdas):
+        # Como Canvas.xview/yview: ('moveto', fracción) o ('scroll', n, 'units'|'pages')
+        total = celdas * self.tam_celda
+        if args[0] == 'moveto':
+            return float(args[1])
+        paso = self.tam_celda if args[2] == 'units' else lado * 0.9
+        return (origen + int(args[1]) * paso) / total
+
+    def canvasx(self, x):
+        return self.origen_x + x
+
+    def canvasy(self, y):
+        return self.origen_y + y
+
+def medir(funcion, filas, columnas, repeticiones):
+    """Corre un benchmark.
+
+    Devuelve:
+        dict: 'tiempo' (segundos, mínimo de las repeticiones), 'memoria_pico'
+              (bytes) y 'operaciones'
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        t = time.perf_counter()
+        operaciones = funcion(filas, columnas)
+        tiempos.append(time.perf_counter() - t)
+    tracemalloc.start()
+    funcion(filas, columnas)
+    _, memoria_pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'tiempo': round(min(tiempos), 6), 'memoria_pico': memoria_pico, 'operaciones': operaciones}
+
+def comparar(resultados, base, umbral):
+    """Compara resultados contra una base.
+
+    Devuelve:
+        list<str>: Descripción de cada regresión (tiempo o memoria mayores
+                   que la base en más de ``umbral``, como fracción).
+    """
+    regresiones = []
+    for clave, actual in resultados.items():
+        anterior = base.get(clave)
+        if anterior is None:
+            continue
+        for medida in ('tiempo', 'memoria_pico'):
+            if anterior[medida] and actual[medida] > anterior[medida] * (1 + umbral):
+                regresiones.append(f'{clave}: {medida} {anterior[medida]} -> {actual[medida]}')
+        if actual['operaciones'] != anterior['operaciones']:
+            print(f'{clave}: cambió la cantidad de operaciones '
+                  f'({anterior["operaciones"]} -> {actual["operaciones"]})', file=sys.stderr)
+    return regresiones
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de generación, resolución y dibujo.')
+    parser.add_argument('tamanos', nargs='*', type=tamano, metavar='FILASxCOLUMNAS',
+                        help='tamaños a probar (default: 21x31 101x101 501x501 2001x2001)')
+    parser.add_argument('--solo', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--guardar', metavar='ARCHIVO', help='guardar los resultados como base')
+    parser.add_argument('--comparar', metavar='ARCHIVO', help='comparar contra una base guardada')
+    parser.add_argument('--umbral', type=float, default=0.1,
+                        help='empeoramiento tolerado respecto de la base (default: 0.1 = 10%%)')
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    for nombre in args.solo:
+        for filas, columnas in args.tamanos or TAMANOS:
+            clave = f'{nombre}/{filas}x{columnas}'
+            resultados[clave] = medir(BENCHMARKS[nombre], filas, columnas, args.repeticiones)
+            print(clave, json.dumps(resultados[clave]))
+            sys.stdout.flush()
+
+    if args.guardar:
+        with open(args.guardar, 'w') as archivo:
+            json.dump(resultados, archivo, indent=2)
+    if args.comparar:
+        with open(args.comparar) as archivo:
+            regresiones = comparar(resultados, json.load(archivo), args.umbral)
+        for regresion in regresiones:
+            print('REGRESIÓN', regresion)
+        if regresiones:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
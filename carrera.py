@@ -0,0 +1,103 @@
+"""Carreras de solucionadores sobre un mismo mapa.
+
+Todos los agentes leen el mismo Mapa (que no se modifica durante la
+carrera) y cada uno guarda sólo su propio estado. En cada tick se avanzan
+todos los agentes un lote de pasos, y sólo cambian las celdas donde estaban
+y donde quedaron los agentes.
+
+Ejemplo:
+    >>> carrera = Carrera(mapa, agentes_por_defecto(mapa))
+    >>> while not carrera.terminada():
+    ...     cambiadas = carrera.avanzar(100)
+    >>> carrera.posiciones()
+"""
+from itertools import permutations
+from ia import IAOrdenada, ORDEN_IA, SOLUCIONADORES, avanzar_pasos
+
+class Carrera:
+    """
+    Varios solucionadores (IA, BFS, IAOrdenada, etc.) avanzando a la par
+    sobre el mismo mapa.
+    """
+
+    def __init__(self, mapa, agentes):
+        """Constructor.
+
+        Argumentos:
+            mapa (Mapa): El mapa, compartido por todos los agentes
+            agentes (list<(str, solucionador)>): Nombre y solucionador de
+                cada agente, todos creados sobre ``mapa``
+        """
+        self.mapa = mapa
+        self.nombres = [nombre for nombre, _ in agentes]
+        self.agentes = [agente for _, agente in agentes]
+        # Sólo importa dónde está cada agente: nadie les pide cambios()
+        for agente in self.agentes:
+            agente.no_registrar_cambios()
+        self.coords = [agente.coord_jugador() for agente in self.agentes]
+        self.ticks = 0
+        # Tick en el que terminó cada agente, o None si sigue corriendo
+        self.llegadas = [None] * len(self.agentes)
+
+    def avanzar(self, pasos):
+        """Avanza cada agente que no terminó hasta ``pasos`` pasos.
+
+        Devuelve:
+            list<Coord>: Las celdas donde estaban y donde quedaron los
+                         agentes que se movieron
+        """
+        self.ticks += 1
+        cambiadas = []
+        for k, agente in enumerate(self.agentes):
+            if self.llegadas[k] is not None:
+                continue
+            avanzar_pasos(agente, pasos)
+            if agente.terminado():
+                self.llegadas[k] = self.ticks
+            coord = agente.coord_jugador()
+            if coord != self.coords[k]:
+                cambiadas.append(self.coords[k])
+                cambiadas.append(coord)
+                self.coords[k] = coord
+        return cambiadas
+
+    def terminada(self):
+        """¿Terminaron todos los agentes?"""
+        return all(llegada is not None for llegada in self.llegadas)
+
+    def posiciones(self):
+        """Posición de cada agente, en el orden en que se pasaron.
+
+        Devuelve:
+            list<Coord>: Las posiciones
+        """
+        return list(self.coords)
+
+    def resultados(self):
+        """Estado de cada agente, ordenado de mejor a peor: primero los que
+        llegaron al destino, por cantidad de pasos.
+
+        Devuelve:
+            list<(str, int, bool, bool)>: Nombre, pasos, si terminó y si
+                llegó al destino
+        """
+        destino = self.mapa.destino()
+        resultados = []
+        for nombre, agente, llegada in zip(self.nombres, self.agentes, self.llegadas):
+            llego = agente.coord_jugador() == destino
+            resultados.append((nombre, agente.pasos, llegada is not None, llego))
+        resultados.sort(key=lambda r: (not r[3], r[1]))
+        return resultados
+
+def agentes_por_defecto(mapa):
+    """Agentes de una carrera con todos los solucionadores de
+    ia.SOLUCIONADORES y una IAOrdenada por cada orden de direcciones.
+
+    Devuelve:
+        list<(str, solucionador)>: Nombre y solucionador de cada agente
+    """
+    agentes = [(nombre, clase(mapa)) for nombre, clase in SOLUCIONADORES.items()]
+    for orden in permutations(ORDEN_IA):
+        nombre = '-'.join(direccion[:3] for direccion in orden)
+        agentes.append((nombre, IAOrdenada(mapa, orden)))
+    return agentes
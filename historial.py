@@ -0,0 +1,172 @@
+"""Historial de ediciones de un mapa, para deshacer y rehacer.
+
+Cada edición (un clic, o todo un arrastre del mouse) se guarda como una
+diferencia: los índices de las celdas que cambiaron de estado (ver
+Mapa.indice), los de las celdas que cambiaron de costo con sus costos
+anteriores y nuevos y, si cambiaron, el origen y el destino anteriores y
+nuevos. Deshacer o rehacer sólo vuelve a cambiar esas celdas.
+
+Ejemplo:
+    >>> historial = Historial()
+    >>> mapa.bloquear(coord)
+    >>> historial.alternada(mapa.indice(coord))
+    >>> historial.confirmar()
+    >>> historial.deshacer(mapa)
+"""
+from array import array
+from collections import deque
+
+class Edicion:
+    """Diferencia entre dos estados de un mapa."""
+    __slots__ = ('alternadas', 'origen', 'destino', 'costos')
+
+    def __init__(self, alternadas, origen=None, destino=None, costos=None):
+        """Constructor.
+
+        Argumentos:
+            alternadas (array<int>): Índices de las celdas que pasaron de
+                bloqueadas a desbloqueadas o al revés
+            origen ((Coord, Coord)|None): Origen anterior y nuevo, si cambió
+            destino ((Coord, Coord)|None): Destino anterior y nuevo, si cambió
+            costos ((array<int>, bytes, bytes)|None): Índices de las celdas
+                que cambiaron de costo, con sus costos anteriores y nuevos
+        """
+        self.alternadas = alternadas
+        self.origen = origen
+        self.destino = destino
+        self.costos = costos
+
+    def invertida(self):
+        """La edición que deshace a esta."""
+        return Edicion(self.alternadas,
+                       self.origen and self.origen[::-1],
+                       self.destino and self.destino[::-1],
+                       self.costos and (self.costos[0], self.costos[2], self.costos[1]))
+
+    def aplicar(self, mapa):
+        """Aplica la edición al mapa (que tiene que estar en el estado
+        anterior a la edición)."""
+        celdas = mapa.celdas
+        for i in self.alternadas:
+            if celdas[i]:
+                mapa.desbloquear_indice(i)
+            else:
+                mapa.bloquear_indice(i)
+        if self.origen is not None:
+            mapa.asignar_origen(self.origen[1])
+        if self.destino is not None:
+            mapa.asignar_destino(self.destino[1])
+        if self.costos is not None:
+            indices, _, nuevos = self.costos
+            coord_de_indice = mapa.coord_de_indice
+            for i, costo in zip(indices, nuevos):
+                mapa.asignar_costo(coord_de_indice(i), costo)
+
+    def indices(self):
+        """Índices de todas las celdas que cambian con la edición."""
+        if self.costos is None:
+            return self.alternadas
+        return self.alternadas + self.costos[0]
+
+    def tamano(self):
+        return len(self.alternadas) + (len(self.costos[0]) if self.costos else 0) + 1
+
+class Historial:
+    """
+    Ediciones hechas (para deshacer) y deshechas (para rehacer), con una
+    cantidad acotada de celdas: al pasarse, se olvidan las ediciones más
+    viejas.
+    """
+
+    def __init__(self, max_celdas=1 << 20):
+        """Constructor.
+
+        Argumentos:
+            max_celdas (int): Máximo de celdas guardadas entre todas las
+                ediciones
+        """
+        self.max_celdas = max_celdas
+        self.hechas = deque()
+        self.deshechas = []
+        self.celdas = 0
+        # Edición en curso: celdas alternadas (una celda alternada dos veces
+        # vuelve a su estado, así que se descarta), costos anteriores y
+        # nuevos por celda, origen y destino
+        self.en_curso = set()
+        self.costos = {}
+        self.origen = None
+        self.destino = None
+
+    def alternada(self, i):
+        """Registra en la edición en curso que la celda de índice ``i`` pasó
+        de bloqueada a desbloqueada o al revés."""
+        self.en_curso ^= {i}
+
+    def costo_cambiado(self, i, anterior, nuevo):
+        """Registra en la edición en curso un cambio de costo de la celda de
+        índice ``i``."""
+        self.costos[i] = (self.costos[i][0] if i in self.costos else anterior, nuevo)
+
+    def origen_cambiado(self, anterior, nuevo):
+        """Registra en la edición en curso un cambio de origen."""
+        self.origen = (self.origen[0] if self.origen else anterior, nuevo)
+
+    def destino_cambiado(self, anterior, nuevo):
+        """Registra en la edición en curso un cambio de destino."""
+        self.destino = (self.destino[0] if self.destino else anterior, nuevo)
+
+    def confirmar(self):
+        """Termina la edición en curso y la guarda, si cambió algo. Las
+        ediciones deshechas ya no se pueden rehacer."""
+        origen = self.origen if self.origen and self.origen[0] != self.origen[1] else None
+        destino = self.destino if self.destino and self.destino[0] != self.destino[1] else None
+        alternadas = self.en_curso
+        costos = sorted((i, anterior, nuevo) for i, (anterior, nuevo) in self.costos.items() if anterior != nuevo)
+        self.en_curso = set()
+        self.costos = {}
+        self.origen = None
+        self.destino = None
+        if not alternadas and not costos and origen is None and destino is None:
+            return
+        if costos:
+            indices, anteriores, nuevos = zip(*costos)
+            costos = (array('l', indices), bytes(anteriores), bytes(nuevos))
+        edicion = Edicion(array('l', sorted(alternadas)), origen, destino, costos or None)
+        for deshecha in self.deshechas:
+            self.celdas -= deshecha.tamano()
+        self.deshechas = []
+        self.hechas.append(edicion)
+        self.celdas += edicion.tamano()
+        while self.celdas > self.max_celdas and len(self.hechas) > 1:
+            self.celdas -= self.hechas.popleft().tamano()
+
+    def deshacer(self, mapa):
+        """Deshace la última edición (confirmando antes la edición en curso).
+
+        Devuelve:
+            Edicion|None: La edición aplicada al mapa (la inversa de la
+                          deshecha), o None si no había nada para deshacer
+        """
+        self.confirmar()
+        if not self.hechas:
+            return None
+        edicion = self.hechas.pop()
+        self.deshechas.append(edicion)
+        inversa = edicion.invertida()
+        inversa.aplicar(mapa)
+        return inversa
+
+    def rehacer(self, mapa):
+        """Vuelve a hacer la última edición deshecha.
+
+        Devuelve:
+            Edicion|None: La edición aplicada al mapa, o None si no había
+                          nada para rehacer
+        """
+        self.confirmar()
+        if not self.deshechas:
+            return None
+        edicion = self.deshechas.pop()
+        self.hechas.append(edicion)
+        edicion.aplicar(mapa)
+        return edicion
@@ -1,3 +1,6 @@
+from array import array
+from collections import deque
+from heapq import heappush, heappop
 from mapa import *
 
 class IA:
@@ -28,6 +31,13 @@ class IA:
         self.actual = mapa.coord_origen
         self.visitadas = set()
         self.recorrido = []
+        self.sin_salida = False
+        self.pasos = 0
+        # Cantidad de veces que está cada celda en recorrido
+        self.en_recorrido = {}
+        # Celdas que cambiaron desde la última llamada a cambios(), o None
+        # si no se registran (ver no_registrar_cambios)
+        self.cambiadas = set()
 
     def coord_jugador(self):
         """Coordenadas del "jugador".
@@ -98,27 +108,1185 @@ class IA:
         Si el jugador no está en la celda destino, y hay algún movimiento
         posible hacia una celda no visitada, se efectúa ese movimiento.
         """
+        anterior = self.actual
+        cambiadas = self.cambiadas
         if self.actual != self.mapa.origen(): #Para que la celda origen no quede pintada de celeste
             self.visitadas.add(self.actual)
+            if cambiadas is not None:
+                cambiadas.add(self.actual)
         if self.actual == self.mapa.destino():
             return
-        celdas_vecinas = buscar_celdas_vecinas(self.actual, self.mapa, self.visitadas)
+        self.pasos += 1
+        # El origen no está en visitadas (para no pintarlo), pero el jugador
+        # empieza ahí: no se vuelve a él, así la búsqueda siempre termina.
+        origen = self.mapa.origen()
+        celdas_vecinas = [vecina for vecina in buscar_celdas_vecinas(self.actual, self.mapa, self.visitadas)
+                          if vecina != origen]
         if celdas_vecinas != []:
             if self.actual != self.mapa.origen(): #Para que la celda origen no quede pintada de azul
-                self.recorrido.append(self.actual)
+                self.apilar(self.actual)
             vecina = celdas_vecinas[0]
-            self.recorrido.append(vecina)
+            self.apilar(vecina)
             self.actual = vecina
+        elif self.recorrido:
+            self.actual = self.desapilar()
         else:
-            self.actual = self.recorrido.pop()
+            self.sin_salida = True
+        if cambiadas is not None:
+            cambiadas.add(anterior)
+            cambiadas.add(self.actual)
+
+    def apilar(self, coord):
+        self.recorrido.append(coord)
+        self.en_recorrido[coord] = self.en_recorrido.get(coord, 0) + 1
+        if self.cambiadas is not None:
+            self.cambiadas.add(coord)
+
+    def desapilar(self):
+        coord = self.recorrido.pop()
+        if self.en_recorrido[coord] == 1:
+            del self.en_recorrido[coord]
+        else:
+            self.en_recorrido[coord] -= 1
+        if self.cambiadas is not None:
+            self.cambiadas.add(coord)
+        return coord
+
+    def visitada(self, coord):
+        """¿La celda está en visitados()?"""
+        return coord in self.visitadas
+
+    def en_camino(self, coord):
+        """¿La celda está en camino()?"""
+        return coord in self.en_recorrido
+
+    def cambios(self):
+        """Celdas que cambiaron desde la última llamada a cambios().
+
+        Incluye las celdas que pasaron a estar visitadas, las que entraron o
+        salieron del camino, y la posición anterior y la nueva del jugador.
+
+        Devuelve:
+            iterable<Coord>|None: Las celdas que cambiaron, o None si puede
+                                  haber cambiado cualquier celda (ver
+                                  no_registrar_cambios())
+        """
+        cambiadas = self.cambiadas
+        if cambiadas is not None:
+            self.cambiadas = set()
+        return cambiadas
+
+    def no_registrar_cambios(self):
+        """Deja de registrar qué celdas cambian, para quien no va a llamar a
+        cambios() (por ejemplo, una carrera): de ahí en más cambios()
+        devuelve None."""
+        self.cambiadas = None
+
+    def terminado(self):
+        """¿Terminó la simulación?
+
+        Devuelve:
+            bool: True si el jugador llegó al destino o ya no le quedan
+                  movimientos posibles
+        """
+        return self.actual == self.mapa.destino() or self.sin_salida
+
+    def resolver(self):
+        """Avanza la simulación hasta que termina (ver terminado()).
+
+        Devuelve:
+            secuencia<Coord>: El camino calculado (ver camino())
+        """
+        while not self.terminado():
+            self.avanzar()
+        return self.camino()
 
 def buscar_celdas_vecinas(celda, mapa, visitadas):
     '''Dada una celda, mapa y un conjunto de celdas visitadas,
     devuelve una lista de todas las celdas vecinas válidas.'''
-    posible_direcciones = [(1,0),(0,1),(-1,0),(0,-1)] #Abajo, Derecha, Arriba, Izquierda.Así llega más rápido al destino
+    #Abajo, Derecha, Arriba, Izquierda (ver Mapa.desplazamientos_vecinos). Así llega más rápido al destino
+    coord_de_indice = mapa.coord_de_indice
     celdas_vecinas = []
-    for df, dc in posible_direcciones:
-        vecina = mapa.trasladar_coord(celda, df, dc)
-        if  vecina != celda and vecina not in mapa.paredes and vecina not in visitadas:
+    for i in indices_vecinos(mapa, mapa.indice(celda)):
+        vecina = coord_de_indice(i)
+        if vecina not in visitadas:
             celdas_vecinas.append(vecina)
     return celdas_vecinas
+
+def indices_vecinos(mapa, i):
+    '''Dado el índice de una celda (ver Mapa.indice), devuelve los índices de las
+    celdas vecinas desbloqueadas, en el mismo orden y con los mismos límites que
+    buscar_celdas_vecinas (ver Mapa.desplazamientos_vecinos).'''
+    return [i + d for d in mapa.desplazamientos_vecinos(i)]
+
+def avanzar_pasos(ia, pasos):
+    '''Avanza un solucionador (IA, BFS, etc.) hasta ``pasos`` pasos, con su
+    método avanzar_pasos() si lo tiene, o de a uno con avanzar().'''
+    metodo = getattr(ia, 'avanzar_pasos', None)
+    if metodo is not None:
+        metodo(pasos)
+        return
+    for _ in range(pasos):
+        if ia.terminado():
+            break
+        ia.avanzar()
+
+class _SecuenciaCeldas:
+    '''Secuencia de sólo lectura de coordenadas, guardadas como índices de celdas
+    del mapa (ver Mapa.indice).'''
+    def __init__(self, mapa, indices):
+        self.mapa = mapa
+        self.indices = indices
+    def __len__(self):
+        return len(self.indices)
+    def __getitem__(self, k):
+        return self.mapa.coord_de_indice(self.indices[k])
+    def __iter__(self):
+        coord_de_indice = self.mapa.coord_de_indice
+        return (coord_de_indice(i) for i in self.indices)
+
+# Bits de vecindad de cada dirección (ver Mapa.desplazamientos_vecinos)
+DIRECCIONES = {'abajo': 1, 'derecha': 2, 'arriba': 4, 'izquierda': 8}
+ORDEN_IA = ('abajo', 'derecha', 'arriba', 'izquierda')
+
+class IAOrdenada:
+    """
+    Variante compacta de IA: recorre en profundidad probando las direcciones
+    en un orden dado.
+
+    Sólo lee el mapa (la tabla de vecinas, ver Mapa.tabla_vecinos), así que
+    muchas instancias pueden compartir el mismo mapa. El estado propio es un
+    byte por celda y la pila del camino. A diferencia de IA, el origen
+    también se marca como visitado, así que la búsqueda siempre termina.
+    """
+
+    # estado[i]: 0 si la celda no se visitó, 1 si se visitó y 2 si además
+    # está en el camino.
+    VISITADA = 1
+    EN_CAMINO = 2
+
+    def __init__(self, mapa, orden=ORDEN_IA):
+        """Constructor.
+
+        Argumentos:
+            mapa (Mapa): El mapa con el laberinto a resolver
+            orden (secuencia<str>): Las cuatro direcciones (ver DIRECCIONES)
+                en el orden en que se prueban
+        """
+        if sorted(orden) != sorted(DIRECCIONES):
+            raise ValueError(f'orden de direcciones inválido: {orden}')
+        self.mapa = mapa
+        self.orden = tuple(orden)
+        self.vecindad, _ = mapa.tabla_vecinos()
+        self.desplazamientos = tabla_desplazamientos(mapa.columnas, [DIRECCIONES[d] for d in orden])
+        filas, columnas = mapa.dimension()
+        self.estado = bytearray(filas * columnas)
+        self.origen = mapa.indice(mapa.origen())
+        self.destino = mapa.indice(mapa.destino())
+        self.pila = array('l', [self.origen])
+        self.estado[self.origen] = IAOrdenada.EN_CAMINO
+        self.actual = self.origen
+        self.sin_salida = False
+        self.pasos = 0
+        # Índices de las celdas que cambiaron desde la última llamada a
+        # cambios(), o None si puede haber cambiado cualquiera
+        self.cambiadas = set()
+        self.registrar_cambios = True
+
+    def coord_jugador(self):
+        """Coordenadas del "jugador"."""
+        return self.mapa.coord_de_indice(self.actual)
+
+    def visitados(self):
+        """Celdas visitadas, en orden de índice."""
+        return _SecuenciaCeldas(self.mapa, [i for i, e in enumerate(self.estado) if e])
+
+    def camino(self):
+        """Camino desde el origen hasta la celda del jugador (incluidas)."""
+        return _SecuenciaCeldas(self.mapa, self.pila)
+
+    def visitada(self, coord):
+        """¿La celda está en visitados()?"""
+        i = self.mapa.indice(coord)
+        return i is not None and self.estado[i] != 0
+
+    def en_camino(self, coord):
+        """¿La celda está en camino()?"""
+        i = self.mapa.indice(coord)
+        return i is not None and self.estado[i] == IAOrdenada.EN_CAMINO
+
+    def cambios(self):
+        """Celdas que cambiaron desde la última llamada a cambios().
+
+        Devuelve:
+            list<Coord>|None: Las celdas que cambiaron, o None si puede
+                              haber cambiado cualquier celda (después de
+                              avanzar_pasos(), resolver() o
+                              no_registrar_cambios())
+        """
+        cambiadas = self.cambiadas
+        self.cambiadas = set() if self.registrar_cambios else None
+        if cambiadas is None:
+            return None
+        coord_de_indice = self.mapa.coord_de_indice
+        return [coord_de_indice(i) for i in cambiadas]
+
+    def no_registrar_cambios(self):
+        """Deja de registrar qué celdas cambian (ver IA.no_registrar_cambios)."""
+        self.registrar_cambios = False
+        self.cambiadas = None
+
+    def terminado(self):
+        """¿Terminó la simulación? (se llegó al destino o no quedan
+        movimientos posibles)"""
+        return self.actual == self.destino or self.sin_salida
+
+    def avanzar(self):
+        """Avanza un paso en la simulación."""
+        anterior = self.actual
+        cambiadas = self.cambiadas
+        self.avanzar_pasos(1)
+        # Al avanzar cambia la celda nueva; al retroceder, la que se dejó
+        if cambiadas is not None:
+            cambiadas.add(anterior)
+            cambiadas.add(self.actual)
+        self.cambiadas = cambiadas
+
+    def avanzar_pasos(self, pasos):
+        """Avanza hasta ``pasos`` pasos, sin llamadas a métodos por paso.
+        No registra qué celdas cambiaron (ver cambios()).
+
+        Devuelve:
+            int: Los pasos que se avanzaron (menos que ``pasos`` si la
+                 simulación terminó antes)
+        """
+        vecindad = self.vecindad
+        desplazamientos = self.desplazamientos
+        estado = self.estado
+        pila = self.pila
+        destino = self.destino
+        actual = self.actual
+        dados = 0
+        while dados < pasos and actual != destino and not self.sin_salida:
+            dados += 1
+            for d in desplazamientos[vecindad[actual]]:
+                vecina = actual + d
+                if not estado[vecina]:
+                    estado[vecina] = IAOrdenada.EN_CAMINO
+                    pila.append(vecina)
+                    actual = vecina
+                    break
+            else:
+                estado[pila.pop()] = IAOrdenada.VISITADA
+                if pila:
+                    actual = pila[-1]
+                else:
+                    self.sin_salida = True
+        self.actual = actual
+        self.pasos += dados
+        self.cambiadas = None
+        return dados
+
+    def resolver(self):
+        """Avanza la simulación hasta que termina (ver terminado()).
+
+        Devuelve:
+            secuencia<Coord>: El camino calculado (ver camino())
+        """
+        while not self.terminado():
+            self.avanzar_pasos(1 << 16)
+        return self.camino()
+
+class Busqueda:
+    """
+    Base de los solucionadores que buscan el camino más corto (BFS y A*).
+
+    Tienen la misma interfaz que IA (coord_jugador, visitados, camino, avanzar,
+    terminado y resolver): cada llamada a avanzar() expande una celda de la
+    frontera, y el "jugador" es la última celda expandida. El estado se guarda
+    en arreglos planos indexados por celda (ver Mapa.indice).
+    """
+
+    def __init__(self, mapa):
+        """Constructor.
+
+        Argumentos:
+            mapa (Mapa): El mapa con el laberinto a resolver
+        """
+        self.mapa = mapa
+        filas, columnas = mapa.dimension()
+        # padres[i] es la celda desde la que se llegó a i, o -1 si todavía no
+        # se llegó a i.
+        self.padres = array('l', [-1]) * (filas * columnas)
+        self.origen = mapa.indice(mapa.origen())
+        self.destino = mapa.indice(mapa.destino())
+        self.padres[self.origen] = self.origen
+        self.actual = self.origen
+        self.expandidas = array('l')
+        self.expandida = bytearray(filas * columnas)
+        self.pasos = 0
+        # Camino marcado en marcas_camino (ver actualizar_camino)
+        self.marcas_camino = bytearray(filas * columnas)
+        self.camino_marcado = []
+        self.actual_marcado = None
+        # Índices de las celdas que cambiaron desde la última llamada a
+        # cambios(), o None si puede haber cambiado cualquiera.
+        self.cambiadas = set()
+        self.registrar_cambios = True
+
+    def coord_jugador(self):
+        """Coordenadas de la última celda expandida."""
+        return self.mapa.coord_de_indice(self.actual)
+
+    def visitados(self):
+        """Celdas expandidas hasta el momento, en orden."""
+        return _SecuenciaCeldas(self.mapa, self.expandidas)
+
+    def camino(self):
+        """Camino desde el origen hasta la celda del jugador (incluidas)."""
+        return _SecuenciaCeldas(self.mapa, self.indices_camino())
+
+    def indices_camino(self):
+        camino = []
+        i = self.actual
+        while i != self.origen:
+            camino.append(i)
+            i = self.padres[i]
+        camino.append(i)
+        camino.reverse()
+        return camino
+
+    def visitada(self, coord):
+        """¿La celda está en visitados()?"""
+        i = self.mapa.indice(coord)
+        return i is not None and self.expandida[i] == 1
+
+    def en_camino(self, coord):
+        """¿La celda está en camino()?"""
+        self.actualizar_camino()
+        i = self.mapa.indice(coord)
+        return i is not None and self.marcas_camino[i] == 1
+
+    def actualizar_camino(self):
+        """Marca en marcas_camino el camino hasta la celda actual, y registra
+        como cambiadas las celdas que entraron o salieron del camino."""
+        if self.actual == self.actual_marcado:
+            return
+        anterior = self.camino_marcado
+        nuevo = self.indices_camino()
+        # Los dos caminos empiezan en el origen: sólo cambia lo que está
+        # después de la parte en común.
+        k = 0
+        while k < len(anterior) and k < len(nuevo) and anterior[k] == nuevo[k]:
+            k += 1
+        for i in anterior[k:]:
+            self.marcas_camino[i] = 0
+        for i in nuevo[k:]:
+            self.marcas_camino[i] = 1
+        if self.cambiadas is not None:
+            self.cambiadas.update(anterior[k:])
+            self.cambiadas.update(nuevo[k:])
+        self.camino_marcado = nuevo
+        self.actual_marcado = self.actual
+
+    def cambios(self):
+        """Celdas que cambiaron desde la última llamada a cambios().
+
+        Incluye las celdas que pasaron a estar visitadas, las que entraron o
+        salieron del camino, y la posición anterior y la nueva del jugador.
+
+        Devuelve:
+            iterable<Coord>|None: Las celdas que cambiaron, o None si puede
+                                  haber cambiado cualquier celda (por
+                                  ejemplo, después de resolver() o de
+                                  no_registrar_cambios())
+        """
+        if not self.registrar_cambios:
+            return None
+        self.actualizar_camino()
+        cambiadas = self.cambiadas
+        self.cambiadas = set()
+        if cambiadas is None:
+            return None
+        coord_de_indice = self.mapa.coord_de_indice
+        return [coord_de_indice(i) for i in cambiadas]
+
+    def no_registrar_cambios(self):
+        """Deja de registrar qué celdas cambian (ver IA.no_registrar_cambios)."""
+        self.registrar_cambios = False
+        self.cambiadas = None
+
+    def terminado(self):
+        """¿Terminó la búsqueda? (se llegó al destino o no quedan celdas por
+        expandir)"""
+        return self.actual == self.destino or not self.frontera
+
+    def avanzar(self):
+        """Expande la siguiente celda de la frontera."""
+        if self.terminado():
+            return
+        anterior = self.actual
+        actual = self.actual = self.sacar()
+        self.expandidas.append(actual)
+        self.expandida[actual] = 1
+        self.pasos += 1
+        if self.cambiadas is not None:
+            self.cambiadas.add(anterior)
+            self.cambiadas.add(actual)
+        if actual == self.destino:
+            return
+        for vecina in indices_vecinos(self.mapa, actual):
+            self.agregar(vecina, actual)
+
+    def resolver(self):
+        """Avanza la búsqueda hasta que termina (ver terminado()).
+
+        Devuelve:
+            secuencia<Coord>: El camino calculado (ver camino())
+        """
+        while not self.terminado():
+            self.avanzar()
+        return self.camino()
+
+class BFS(Busqueda):
+    """Búsqueda en anchura: expande las celdas en orden de distancia al origen."""
+
+    def __init__(self, mapa):
+        super().__init__(mapa)
+        self.frontera = deque([self.origen])
+
+    def sacar(self):
+        return self.frontera.popleft()
+
+    def agregar(self, vecina, actual):
+        if self.padres[vecina] == -1:
+            self.padres[vecina] = actual
+            self.frontera.append(vecina)
+
+    def resolver(self):
+        # Misma búsqueda que avanzar() pero sin llamadas a métodos por celda.
+        vecindad, desplazamientos = self.mapa.tabla_vecinos()
+        padres = self.padres
+        frontera = self.frontera
+        expandidas = self.expandidas
+        expandida = self.expandida
+        destino = self.destino
+        actual = self.actual
+        while frontera and actual != destino:
+            actual = frontera.popleft()
+            expandidas.append(actual)
+            expandida[actual] = 1
+            if actual == destino:
+                break
+            for d in desplazamientos[vecindad[actual]]:
+                vecina = actual + d
+                if padres[vecina] == -1:
+                    padres[vecina] = actual
+                    frontera.append(vecina)
+        self.actual = actual
+        self.pasos = len(expandidas)
+        self.cambiadas = None
+        return self.camino()
+
+class AEstrella(Busqueda):
+    """Búsqueda A*, usando la distancia Manhattan al destino como heurística."""
+
+    def __init__(self, mapa):
+        super().__init__(mapa)
+        filas, columnas = mapa.dimension()
+        # costos[i] es la menor distancia conocida desde el origen hasta i.
+        self.costos = array('l', [-1]) * (filas * columnas)
+        self.costos[self.origen] = 0
+        self.cerradas = bytearray(filas * columnas)
+        # Entradas (costo estimado, heurística, celda): a igual costo estimado
+        # se prefiere la celda más cercana al destino.
+        h = self.heuristica(self.origen)
+        self.frontera = [(h, h, self.origen)]
+
+    def heuristica(self, i):
+        columnas = self.mapa.columnas
+        f, c = divmod(i, columnas)
+        df, dc = divmod(self.destino, columnas)
+        return abs(f - df) + abs(c - dc)
+
+    def sacar(self):
+        while True:
+            _, _, i = heappop(self.frontera)
+            if not self.cerradas[i]:
+                self.cerradas[i] = 1
+                return i
+
+    def terminado(self):
+        # La frontera puede tener entradas repetidas de celdas ya cerradas.
+        while self.frontera and self.cerradas[self.frontera[0][2]]:
+            heappop(self.frontera)
+        return super().terminado()
+
+    def agregar(self, vecina, actual):
+        costo = self.costos[actual] + 1
+        if self.costos[vecina] == -1 or costo < self.costos[vecina]:
+            self.costos[vecina] = costo
+            self.padres[vecina] = actual
+            h = self.heuristica(vecina)
+            heappush(self.frontera, (costo + h, h, vecina))
+
+class Dijkstra(Busqueda):
+    """
+    Búsqueda del camino de menor costo (ver Mapa.costo): entrar a cada
+    celda cuesta su costo, en lugar de 1.
+
+    Como los costos son enteros chicos (hasta COSTO_MAXIMO), en lugar de un
+    heap se usa una cola de cubetas (algoritmo de Dial): una lista de celdas
+    por distancia. Las distancias pendientes están siempre entre la actual y
+    la actual más el mayor costo del mapa, así que alcanza con esa cantidad
+    de cubetas, usadas en forma circular.
+    """
+
+    INFINITO = 1 << 60
+
+    def __init__(self, mapa):
+        super().__init__(mapa)
+        filas, columnas = mapa.dimension()
+        self.costos = mapa.tabla_costos()
+        # distancias[i] es el menor costo conocido desde el origen hasta i
+        self.distancias = array('q', [self.INFINITO]) * (filas * columnas)
+        self.distancias[self.origen] = 0
+        self.cubetas = [[] for _ in range(max(self.costos, default=1) + 1)]
+        self.cubetas[0].append(self.origen)
+        # Distancia de la cubeta actual, y entradas en todas las cubetas
+        # (incluidas las viejas, de celdas que después se alcanzaron con
+        # menor costo)
+        self.distancia = 0
+        self.pendientes = 1
+
+    def siguiente_cubeta(self):
+        """Avanza hasta la primera cubeta con una entrada vigente, y
+        descarta las entradas viejas que encuentre en el camino.
+
+        Devuelve:
+            bool: False si no quedan celdas por expandir
+        """
+        cubetas = self.cubetas
+        distancias = self.distancias
+        while self.pendientes:
+            cubeta = cubetas[self.distancia % len(cubetas)]
+            while cubeta:
+                # Sólo se agrega una celda al mejorar su distancia, así que
+                # una entrada con la distancia actual de la celda es vigente
+                if distancias[cubeta[-1]] == self.distancia:
+                    return True
+                cubeta.pop()
+                self.pendientes -= 1
+            self.distancia += 1
+        return False
+
+    def terminado(self):
+        return self.actual == self.destino or not self.siguiente_cubeta()
+
+    def sacar(self):
+        self.siguiente_cubeta()
+        self.pendientes -= 1
+        return self.cubetas[self.distancia % len(self.cubetas)].pop()
+
+    def agregar(self, vecina, actual):
+        distancia = self.distancias[actual] + self.costos[vecina]
+        if distancia < self.distancias[vecina]:
+            self.distancias[vecina] = distancia
+            self.padres[vecina] = actual
+            self.cubetas[distancia % len(self.cubetas)].append(vecina)
+            self.pendientes += 1
+
+    def resolver(self):
+        # Misma búsqueda que avanzar() pero sin llamadas a métodos por celda.
+        vecindad, desplazamientos = self.mapa.tabla_vecinos()
+        costos = self.costos
+        distancias = self.distancias
+        padres = self.padres
+        cubetas = self.cubetas
+        n_cubetas = len(cubetas)
+        expandidas = self.expandidas
+        expandida = self.expandida
+        destino = self.destino
+        actual = self.actual
+        distancia = self.distancia
+        pendientes = self.pendientes
+        while pendientes and actual != destino:
+            cubeta = cubetas[distancia % n_cubetas]
+            if not cubeta:
+                distancia += 1
+                continue
+            u = cubeta.pop()
+            pendientes -= 1
+            if distancias[u] != distancia:
+                # Entrada vieja: se llegó a u con menor costo
+                continue
+            actual = u
+            expandidas.append(u)
+            expandida[u] = 1
+            if u == destino:
+                break
+            for d in desplazamientos[vecindad[u]]:
+                v = u + d
+                nueva = distancia + costos[v]
+                if nueva < distancias[v]:
+                    distancias[v] = nueva
+                    padres[v] = u
+                    cubetas[nueva % n_cubetas].append(v)
+                    pendientes += 1
+        self.actual = actual
+        self.distancia = distancia
+        self.pendientes = pendientes
+        self.pasos = len(expandidas)
+        self.cambiadas = None
+        return self.camino()
+
+class PlanificadorIncremental:
+    """
+    Camino de menor costo del origen al destino que se mantiene a medida que
+    se edita el mapa (Lifelong Planning A*, o LPA*).
+
+    Guarda, para cada celda, el costo desde el origen (g) y el que se deduce
+    de sus vecinas (rhs); una celda donde no coinciden es "inconsistente" y
+    está en la frontera. Al bloquear o desbloquear celdas sólo cambian las
+    vecinas de esas celdas (y al cambiar el costo de una celda, sólo esa
+    celda), así que calcular() repara la búsqueda a partir
+    de ahí en lugar de empezar de nuevo desde el origen. Si cambia el origen
+    o el destino, la búsqueda sí empieza de nuevo.
+
+    Los movimientos posibles son los mismos que los de BFS (ver
+    Mapa.desplazamientos_vecinos) y entrar a cada celda cuesta lo mismo que
+    en Dijkstra (ver Mapa.costo), así que el camino tiene el mismo costo. Si
+    el mapa no tiene costos, es el camino más corto, como el de BFS.
+
+    Ejemplo:
+        >>> planificador = PlanificadorIncremental(mapa)
+        >>> planificador.calcular()
+        >>> mapa.bloquear(coord)
+        >>> planificador.celdas_modificadas([coord])
+        >>> planificador.calcular()
+        >>> planificador.camino()
+    """
+
+    INFINITO = 1 << 60
+
+    def __init__(self, mapa):
+        """Constructor.
+
+        Argumentos:
+            mapa (Mapa): El mapa, que se puede seguir editando
+        """
+        self.mapa = mapa
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Descarta la búsqueda y empieza de nuevo desde el origen. Hace falta
+        si el mapa se modificó sin avisar con celdas_modificadas()."""
+        mapa = self.mapa
+        filas, columnas = mapa.dimension()
+        self.coord_origen = mapa.origen()
+        self.coord_destino = mapa.destino()
+        self.origen = mapa.indice(self.coord_origen)
+        self.destino = mapa.indice(self.coord_destino)
+        self.g = array('q', [self.INFINITO]) * (filas * columnas)
+        self.rhs = array('q', [self.INFINITO]) * (filas * columnas)
+        self.frontera = []
+        self.modificadas = set()
+        # Celdas expandidas en total (ver calcular)
+        self.expansiones = 0
+        if self.origen is not None and self.destino is not None:
+            self.rhs[self.origen] = 0
+            heappush(self.frontera, self.clave(self.origen) + (self.origen,))
+
+    def heuristica(self, i):
+        columnas = self.mapa.columnas
+        f, c = divmod(i, columnas)
+        df, dc = divmod(self.destino, columnas)
+        return abs(f - df) + abs(c - dc)
+
+    def clave(self, i):
+        k = min(self.g[i], self.rhs[i])
+        return (k + self.heuristica(i), k)
+
+    def celdas_modificadas(self, coords):
+        """Avisa que se bloquearon o desbloquearon celdas del mapa, o que
+        cambió su costo. La búsqueda se repara en la siguiente llamada a calcular().
+
+        Argumentos:
+            coords (iterable<Coord>): Las celdas modificadas
+        """
+        filas, columnas = self.mapa.dimension()
+        for coord in coords:
+            i = self.mapa.indice(coord)
+            if i is None:
+                continue
+            f, c = divmod(i, columnas)
+            # Cambian los movimientos desde y hacia la celda: hay que revisar
+            # la celda y sus vecinas.
+            self.modificadas.add(i)
+            if f > 0:
+                self.modificadas.add(i - columnas)
+            if f + 1 < filas:
+                self.modificadas.add(i + columnas)
+            if c > 0:
+                self.modificadas.add(i - 1)
+            if c + 1 < columnas:
+                self.modificadas.add(i + 1)
+
+    def costo(self, i):
+        # Como Mapa.costo, pero por índice. Se consulta mapa.costos cada vez
+        # porque la tabla se crea recién al asignar el primer costo.
+        costos = self.mapa.costos
+        return 1 if costos is None else costos[i]
+
+    def actualizar_celda(self, v, vecindad, celdas):
+        # rhs(v) es el menor costo desde el origen pasando por una vecina
+        # desde la que se puede llegar a v, más el costo de entrar a v.
+        if v != self.origen:
+            columnas = self.mapa.columnas
+            n = len(celdas)
+            g = self.g
+            mejor = self.INFINITO
+            # Para cada vecina u de v, el bit de vecindad[u] que indica que
+            # se puede ir de u a v.
+            for u, bit in ((v - columnas, 1), (v - 1, 2), (v + columnas, 4), (v + 1, 8)):
+                if 0 <= u < n and vecindad[u] & bit and (not celdas[u] or u == self.origen) and g[u] < mejor:
+                    mejor = g[u]
+            if mejor < self.INFINITO:
+                mejor += self.costo(v)
+            self.rhs[v] = mejor
+        if self.g[v] != self.rhs[v]:
+            heappush(self.frontera, self.clave(v) + (v,))
+
+    def calcular(self):
+        """Repara la búsqueda después de las modificaciones avisadas, hasta
+        conocer el camino de menor costo al destino (o saber que no hay).
+
+        Devuelve:
+            int: Cantidad de celdas expandidas en esta llamada
+        """
+        if self.mapa.origen() != self.coord_origen or self.mapa.destino() != self.coord_destino:
+            self.reiniciar()
+        if self.origen is None or self.destino is None:
+            return 0
+        vecindad, desplazamientos = self.mapa.tabla_vecinos()
+        celdas = self.mapa.celdas
+        for v in self.modificadas:
+            self.actualizar_celda(v, vecindad, celdas)
+        self.modificadas = set()
+        g = self.g
+        rhs = self.rhs
+        frontera = self.frontera
+        destino = self.destino
+        origen = self.origen
+        expansiones = 0
+        while frontera:
+            k1, k2, u = frontera[0]
+            if g[u] == rhs[u] or (k1, k2) != self.clave(u):
+                # Entrada vieja: la celda ya es consistente o tiene otra clave
+                heappop(frontera)
+                continue
+            if (k1, k2) >= self.clave(destino) and g[destino] == rhs[destino]:
+                break
+            heappop(frontera)
+            expansiones += 1
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]
+            else:
+                g[u] = self.INFINITO
+                self.actualizar_celda(u, vecindad, celdas)
+            if not celdas[u] or u == origen:
+                for d in desplazamientos[vecindad[u]]:
+                    self.actualizar_celda(u + d, vecindad, celdas)
+        self.expansiones += expansiones
+        return expansiones
+
+    def indices_camino(self):
+        """Índices de las celdas del camino de menor costo, del origen al
+        destino (vacío si no hay camino). Hay que llamar antes a calcular()."""
+        if self.destino is None or self.g[self.destino] >= self.INFINITO:
+            return []
+        columnas = self.mapa.columnas
+        vecindad, _ = self.mapa.tabla_vecinos()
+        celdas = self.mapa.celdas
+        n = len(celdas)
+        g = self.g
+        camino = [self.destino]
+        v = self.destino
+        while v != self.origen:
+            anterior = None
+            costo = self.costo(v)
+            for u, bit in ((v - columnas, 1), (v - 1, 2), (v + columnas, 4), (v + 1, 8)):
+                if (0 <= u < n and vecindad[u] & bit and (not celdas[u] or u == self.origen)
+                        and g[u] + costo == g[v]):
+                    anterior = u
+                    break
+            if anterior is None:
+                return []
+            camino.append(anterior)
+            v = anterior
+        camino.reverse()
+        return camino
+
+    def camino(self):
+        """Camino de menor costo del origen al destino (ver indices_camino)."""
+        return _SecuenciaCeldas(self.mapa, self.indices_camino())
+
+class Conectividad:
+    """
+    Componentes conexas de las celdas libres, que se mantienen a medida que
+    se edita el mapa, para saber en todo momento si se puede llegar del
+    origen al destino.
+
+    Cada celda libre (dentro de los límites de es_coord_valida) tiene una
+    etiqueta, y las etiquetas se agrupan en un bosque de conjuntos disjuntos
+    (union-find). Desbloquear una celda sólo une etiquetas. Bloquear una
+    celda puede partir su componente: se recorre a la par desde cada vecina
+    libre, y se termina apenas todos los recorridos menos uno se juntaron o
+    se quedaron sin celdas. Los pedazos que quedaron aislados (los chicos)
+    reciben etiquetas nuevas, y el resto conserva la etiqueta vieja, así que
+    el costo depende del tamaño de los pedazos chicos y no del mapa.
+
+    Los movimientos posibles son los mismos que los de BFS (ver
+    Mapa.desplazamientos_vecinos).
+
+    Ejemplo:
+        >>> conectividad = Conectividad(mapa)
+        >>> mapa.bloquear(coord)
+        >>> conectividad.celdas_modificadas([coord])
+        >>> conectividad.alcanzable()
+    """
+
+    def __init__(self, mapa):
+        """Constructor.
+
+        Argumentos:
+            mapa (Mapa): El mapa, que se puede seguir editando
+        """
+        self.mapa = mapa
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Calcula las componentes desde cero. Hace falta si el mapa se
+        modificó sin avisar con celdas_modificadas()."""
+        mapa = self.mapa
+        filas, columnas = mapa.dimension()
+        self.coord_origen = mapa.origen()
+        celdas = mapa.celdas
+        # nodo[i] es 1 si la celda i está libre y dentro de los límites
+        self.nodo = bytearray(filas * columnas)
+        libre = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+        for f in range(filas - 1):
+            i = f * columnas
+            self.nodo[i:i + columnas - 1] = bytes(celdas[i:i + columnas - 1]).translate(libre)
+        self.etiqueta = array('l', [-1]) * (filas * columnas)
+        # Bosque de etiquetas: padre y tamaño (de las raíces) de cada una
+        self.padres = array('l')
+        self.tamanos = array('l')
+        vecindad, desplazamientos = mapa.tabla_vecinos()
+        nodo = self.nodo
+        etiqueta = self.etiqueta
+        for inicio in range(len(nodo)):
+            if not nodo[inicio] or etiqueta[inicio] != -1:
+                continue
+            e = self.nueva_etiqueta(0)
+            etiqueta[inicio] = e
+            pendientes = [inicio]
+            tamano = 0
+            while pendientes:
+                u = pendientes.pop()
+                tamano += 1
+                for d in desplazamientos[vecindad[u]]:
+                    v = u + d
+                    if etiqueta[v] == -1:
+                        etiqueta[v] = e
+                        pendientes.append(v)
+            self.tamanos[e] = tamano
+
+    def nueva_etiqueta(self, tamano):
+        e = len(self.padres)
+        self.padres.append(e)
+        self.tamanos.append(tamano)
+        return e
+
+    def raiz(self, e):
+        padres = self.padres
+        while padres[e] != e:
+            padres[e] = padres[padres[e]]
+            e = padres[e]
+        return e
+
+    def unir(self, a, b):
+        a = self.raiz(a)
+        b = self.raiz(b)
+        if a == b:
+            return a
+        if self.tamanos[a] < self.tamanos[b]:
+            a, b = b, a
+        self.padres[b] = a
+        self.tamanos[a] += self.tamanos[b]
+        return a
+
+    def componente(self, coord):
+        """Componente de una celda.
+
+        Devuelve:
+            int|None: Un identificador de la componente, o None si la celda
+                      está bloqueada o fuera de los límites
+        """
+        i = self.mapa.indice(coord)
+        if i is None or not self.nodo[i]:
+            return None
+        return self.raiz(self.etiqueta[i])
+
+    def componente_origen(self):
+        """Componentes a las que se puede llegar desde el origen.
+
+        Devuelve:
+            set<int>: Los identificadores (ver componente()). Si el origen
+                está bloqueado, se puede salir de él hacia sus vecinas, así
+                que pueden ser varias.
+        """
+        i = self.mapa.indice(self.mapa.origen())
+        if i is None:
+            return set()
+        raices = {self.raiz(self.etiqueta[i + d]) for d in self.mapa.desplazamientos_vecinos(i)}
+        if self.nodo[i]:
+            raices.add(self.raiz(self.etiqueta[i]))
+        return raices
+
+    def alcanzable(self):
+        """¿Se puede llegar del origen al destino?"""
+        destino = self.mapa.destino()
+        if destino == self.mapa.origen():
+            return True
+        componente = self.componente(destino)
+        return componente is not None and componente in self.componente_origen()
+
+    def celdas_modificadas(self, coords):
+        """Avisa que se bloquearon o desbloquearon celdas del mapa (o que
+        cambió el origen), y actualiza las componentes.
+
+        Argumentos:
+            coords (iterable<Coord>): Las celdas modificadas
+
+        Devuelve:
+            bool: True si, además de las celdas modificadas, puede haber
+                  cambiado qué celdas se alcanzan desde el origen
+        """
+        mapa = self.mapa
+        cambio = mapa.origen() != self.coord_origen
+        self.coord_origen = mapa.origen()
+        filas, columnas = mapa.dimension()
+        celdas = mapa.celdas
+        for coord in coords:
+            i = mapa.indice(coord)
+            if i is None or i % columnas == columnas - 1 or i // columnas == filas - 1:
+                continue
+            libre = not celdas[i]
+            if libre == self.nodo[i]:
+                continue
+            origen = self.componente_origen()
+            vecinas = {self.raiz(self.etiqueta[v]) for v in self.vecinas(i)}
+            if libre:
+                self.nodo[i] = 1
+                e = self.etiqueta[i] = self.nueva_etiqueta(1)
+                for raiz in vecinas:
+                    self.unir(e, raiz)
+                # Se juntaron componentes alcanzables con otras que no
+                if vecinas & origen and vecinas - origen:
+                    cambio = True
+            else:
+                self.nodo[i] = 0
+                self.tamanos[self.raiz(self.etiqueta[i])] -= 1
+                if self.separar(i) and vecinas & origen:
+                    cambio = True
+        return cambio
+
+    def vecinas(self, i):
+        """Índices de las celdas libres vecinas de la celda i.
+
+        No se usa el índice de vecinas del mapa: si se avisan varias celdas
+        modificadas juntas, las componentes tienen que reflejar sólo las
+        que ya se procesaron. Las celdas de la última fila y la última
+        columna nunca son libres (ver nodo), así que alcanza con no salirse
+        del arreglo.
+        """
+        nodo = self.nodo
+        columnas = self.mapa.columnas
+        return [v for v in (i + columnas, i + 1, i - columnas, i - 1) if v >= 0 and nodo[v]]
+
+    def separar(self, i):
+        """Después de bloquear la celda i, da etiquetas nuevas a los pedazos
+        en que quedó partida su componente, si es que se partió.
+
+        Devuelve:
+            bool: True si la componente se partió
+        """
+        vecinas = self.vecinas(i)
+        if len(vecinas) < 2:
+            return False
+        # Un recorrido desde cada vecina; grupo[j] une los recorridos que se
+        # encontraron (como un union-find chico).
+        grupo = list(range(len(vecinas)))
+
+        def grupo_de(j):
+            while grupo[j] != j:
+                j = grupo[j]
+            return j
+
+        marcas = {v: j for j, v in enumerate(vecinas)}
+        fronteras = [deque([v]) for v in vecinas]
+        nodo = self.nodo
+        columnas = self.mapa.columnas
+        # Los grupos sólo se revisan cuando se juntan dos o se vacía una
+        # frontera
+        revisar = True
+        while True:
+            if revisar:
+                grupos = {grupo_de(j) for j in range(len(vecinas))}
+                if len(grupos) == 1:
+                    return False
+                vivos = {grupo_de(j) for j, frontera in enumerate(fronteras) if frontera}
+                if len(vivos) <= 1:
+                    break
+                revisar = False
+            for j, frontera in enumerate(fronteras):
+                if not frontera:
+                    continue
+                u = frontera.popleft()
+                for v in (u + columnas, u + 1, u - columnas, u - 1):
+                    if v < 0 or not nodo[v]:
+                        continue
+                    k = marcas.get(v)
+                    if k is None:
+                        marcas[v] = j
+                        frontera.append(v)
+                    elif k != j:
+                        a, b = grupo_de(k), grupo_de(j)
+                        if a != b:
+                            grupo[a] = b
+                            revisar = True
+                if not frontera:
+                    revisar = True
+        # Los grupos sin frontera son pedazos completos. Si no queda ninguno
+        # con frontera, el más grande conserva la etiqueta vieja.
+        tamanos = dict.fromkeys(grupos, 0)
+        for j in marcas.values():
+            tamanos[grupo_de(j)] += 1
+        if not vivos:
+            vivos = {max(tamanos, key=tamanos.get)}
+        raiz = self.raiz(self.etiqueta[vecinas[0]])
+        nuevas = {}
+        for g in grupos - vivos:
+            nuevas[g] = self.nueva_etiqueta(tamanos[g])
+            self.tamanos[raiz] -= tamanos[g]
+        etiqueta = self.etiqueta
+        for v, j in marcas.items():
+            e = nuevas.get(grupo_de(j))
+            if e is not None:
+                etiqueta[v] = e
+        return True
+
+class Solucion:
+    """
+    Resultado final de un solucionador, con la misma interfaz que IA y
+    Busqueda pero ya terminado: sirve para mostrar al instante una solución
+    guardada (ver soluciones.CacheSoluciones).
+
+    Guarda sólo índices de celdas (ver Mapa.indice), así que no depende de
+    la instancia de Mapa: con_mapa() la asocia a otro mapa con el mismo
+    contenido.
+    """
+
+    def __init__(self, mapa, actual, pasos, visitados, camino):
+        """Constructor.
+
+        Argumentos:
+            mapa (Mapa): El mapa resuelto
+            actual (int): Índice de la celda final del jugador
+            pasos (int): Pasos que dio el solucionador
+            visitados, camino (array<int>): Índices de las celdas visitadas y
+                del camino (ver visitados() y camino() de IA)
+        """
+        self.mapa = mapa
+        self.actual = actual
+        self.pasos = pasos
+        self.indices_visitados = visitados
+        self.indices_camino = camino
+        self.marcas = None
+        self.cambiadas = None
+
+    @classmethod
+    def de_solucionador(cls, ia):
+        """Crea una Solucion con el estado de un solucionador (IA, BFS, etc.)."""
+        mapa = ia.mapa
+        if isinstance(ia, Busqueda):
+            return cls(mapa, ia.actual, ia.pasos, array('l', ia.expandidas), array('l', ia.indices_camino()))
+        indice = mapa.indice
+        return cls(mapa, indice(ia.coord_jugador()), ia.pasos,
+                   array('l', (indice(coord) for coord in ia.visitados())),
+                   array('l', (indice(coord) for coord in ia.camino())))
+
+    def con_mapa(self, mapa):
+        """La misma solución, asociada a otro mapa con el mismo contenido."""
+        return Solucion(mapa, self.actual, self.pasos, self.indices_visitados, self.indices_camino)
+
+    def coord_jugador(self):
+        return self.mapa.coord_de_indice(self.actual)
+
+    def visitados(self):
+        return _SecuenciaCeldas(self.mapa, self.indices_visitados)
+
+    def camino(self):
+        return _SecuenciaCeldas(self.mapa, self.indices_camino)
+
+    def marcar(self):
+        # Un byte por celda: bit 1 = visitada, bit 2 = en el camino
+        filas, columnas = self.mapa.dimension()
+        marcas = bytearray(filas * columnas)
+        for i in self.indices_visitados:
+            marcas[i] = 1
+        for i in self.indices_camino:
+            marcas[i] |= 2
+        self.marcas = marcas
+
+    def visitada(self, coord):
+        """¿La celda está en visitados()?"""
+        if self.marcas is None:
+            self.marcar()
+        i = self.mapa.indice(coord)
+        return i is not None and self.marcas[i] & 1 == 1
+
+    def en_camino(self, coord):
+        """¿La celda está en camino()?"""
+        if self.marcas is None:
+            self.marcar()
+        i = self.mapa.indice(coord)
+        return i is not None and self.marcas[i] & 2 == 2
+
+    def cambios(self):
+        """La primera vez devuelve None (puede haber cambiado cualquier
+        celda); después, ninguna celda."""
+        cambiadas = self.cambiadas
+        self.cambiadas = []
+        return cambiadas
+
+    def no_registrar_cambios(self):
+        # No cambia nunca: no hay nada que dejar de registrar
+        pass
+
+    def terminado(self):
+        return True
+
+    def avanzar(self):
+        pass
+
+    def resolver(self):
+        return self.camino()
+
+SOLUCIONADORES = {
+    'Backtracking': IA,
+    'BFS': BFS,
+    'A*': AEstrella,
+    'Dijkstra': Dijkstra,
+}
@@ -1,115 +1,349 @@
+from array import array
+from collections import OrderedDict
+from random import Random
 from mapa import Coord, Mapa
-from random import choice
-def generar_laberinto(filas, columnas):
+from archivo import EscritorMapa
+
+def generar_laberinto(filas, columnas, semilla=None):
     """Generar un laberinto.
 
     Argumentos:
         filas, columnas (int): Tamaño del mapa
+        semilla (int|None): Semilla para el generador de números aleatorios.
+            Con la misma semilla (y el mismo tamaño) se obtiene siempre el
+            mismo laberinto. Si es None, el laberinto es distinto cada vez.
 
     Devuelve:
         Mapa: un mapa nuevo con celdas bloqueadas formando un laberinto
               aleatorio
     """
+    mapa, pasos = generar_laberinto_por_pasos(filas, columnas, semilla)
+    for _ in pasos:
+        pass
+    return mapa
+
+def generar_laberinto_por_pasos(filas, columnas, semilla=None):
+    """Generar un laberinto de a poco.
+
+    Devuelve el mapa con todas las celdas bloqueadas, junto con un generador
+    que, a medida que se recorre, va desbloqueando las celdas del laberinto.
+    Cada elemento generado es una tupla ``(celda, intermedia)`` con los
+    índices (ver Mapa.indice) de las celdas recién desbloqueadas; en el primer
+    elemento, que corresponde al origen, ``intermedia`` es None.
+
+    Recorrer el generador hasta el final deja el mismo laberinto que
+    devuelve generar_laberinto con la misma semilla.
+
+    Ejemplo:
+        >>> mapa, pasos = generar_laberinto_por_pasos(21, 31, semilla=1)
+        >>> for celda, intermedia in pasos:
+        ...     print(mapa.coord_de_indice(celda))
+
+    Argumentos:
+        filas, columnas (int): Tamaño del mapa
+        semilla (int|None): Ver generar_laberinto
 
+    Devuelve:
+        (Mapa, generador<(int, int|None)>): El mapa y los pasos
+    """
     mapa = Mapa(filas, columnas)
-    for coord in mapa:
-        mapa.bloquear(coord)
+    mapa.bloquear_todas()
     mapa.asignar_origen(Coord(1,1))
+    mapa.asignar_destino(destino_laberinto(filas, columnas))
+    return mapa, backtrack(mapa, Random(semilla))
+
+def destino_laberinto(filas, columnas):
+    """Celda destino de los laberintos generados de ese tamaño."""
     #Para que la celda destino tenga coordenadas impares
     if filas % 2 == 0:
         filas -= 1
     if columnas % 2 == 0:
         columnas -= 1
-    mapa.asignar_destino(Coord(filas - 2, columnas - 2))
-    visitadas = set()
-    backtrack(mapa.origen(), visitadas, mapa)
-    return mapa
+    return Coord(filas - 2, columnas - 2)
 
-def backtrack(celda, visitadas, mapa):
-    '''Recursivamente va desbloqueando las celdas intermedias hasta que la lista de celdas
-    vecinas queda vacia (condicion base) o termino de recorrer el mapa.
-    '''
-    visitadas.add(celda)
-    mapa.paredes.remove(celda)
-    celdas_vecinas = buscar_celdas_vecinas(celda, mapa, visitadas)
-    for celda_v in celdas_vecinas: #este es el que mas rapido y mas tamaño soporta, sigue tirando error mas de 100*100
-    #while celdas_vecinas != []: este es el que estabamos usando
-    #for coord in mapa: este no me convence, tarda mucho en generarlo
-        if celdas_vecinas != [] and celda_v is not mapa.destino():
-            vecina, intermedia = definir_celda_vecina_intermedia(celda, celdas_vecinas, mapa)
-            visitadas.add(intermedia)
-            mapa.paredes.remove(intermedia)
-            backtrack(vecina, visitadas, mapa)
-            celdas_vecinas = buscar_celdas_vecinas(celda, mapa, visitadas)
-
-def buscar_celdas_vecinas(celda, mapa, visitadas):
-    '''Crea la lista de las celdas vecinas posibles trasladando la coordenada actual en todas
-    las direcciones posibles guardadas.
+def backtrack(mapa, aleatorio):
+    '''Va desbloqueando las celdas del mapa a partir del origen, eligiendo al azar
+    una celda vecina no visitada y desbloqueando la intermedia. Cuando una celda se
+    queda sin vecinas vuelve a la anterior.
+
+    En lugar de recursión se usa una pila explícita de índices de celdas
+    (ver Mapa.indice), por lo que no hay límite de recursión y la memoria usada
+    es proporcional al tamaño del mapa.
+
+    Es un generador: ver generar_laberinto_por_pasos.
     '''
-    posibles_direcciones_vecinas = [(2,0),(-2,0),(0,2),(0,-2)]
-    celdas_vecinas = []
-    for df, dc in posibles_direcciones_vecinas:
-        vecina = mapa.trasladar_coord(celda, df, dc)
-        if  vecina != celda and vecina not in visitadas and vecina:
-            celdas_vecinas.append((df ,dc))
-    return celdas_vecinas
-
-def definir_celda_vecina_intermedia(celda, celdas_vecinas, mapa):
-    '''Elije de manera aleatoria entre las posibles direcciones de las celdas vecinas
-    y devuelve una tupla con la vecina elegida y la intermedia entre ella y la actual.
+    filas, columnas = mapa.dimension()
+    celdas = mapa.celdas
+    visitadas = bytearray(filas * columnas)
+    # Mismos límites que Mapa.es_coord_valida
+    max_fila = filas - 1
+    max_columna = columnas - 1
+    elegir = aleatorio.choice
+
+    inicio = mapa.indice(mapa.origen())
+    visitadas[inicio] = 1
+    celdas[inicio] = 0
+    # Se modifican las celdas directamente, sin pasar por Mapa
+    mapa.invalidar_indices()
+    yield inicio, None
+    pila = array('l', [inicio])
+    while pila:
+        actual = pila[-1]
+        f, c = divmod(actual, columnas)
+        vecinas = []
+        if f + 2 < max_fila and not visitadas[actual + 2 * columnas]:
+            vecinas.append(columnas)
+        if f - 2 >= 0 and not visitadas[actual - 2 * columnas]:
+            vecinas.append(-columnas)
+        if c + 2 < max_columna and not visitadas[actual + 2]:
+            vecinas.append(1)
+        if c - 2 >= 0 and not visitadas[actual - 2]:
+            vecinas.append(-1)
+        if not vecinas:
+            pila.pop()
+            continue
+        paso = elegir(vecinas)
+        intermedia = actual + paso
+        vecina = intermedia + paso
+        visitadas[intermedia] = visitadas[vecina] = 1
+        celdas[intermedia] = celdas[vecina] = 0
+        pila.append(vecina)
+        mapa.invalidar_indices()
+        yield vecina, intermedia
+
+def generar_laberinto_eller(filas, columnas, semilla=None):
+    """Generar un laberinto con el algoritmo de Eller (ver filas_eller).
+
+    Tiene el mismo origen, destino y forma de celdas y paredes que los de
+    generar_laberinto, pero es otro laberinto (con otro aspecto: pasillos
+    más cortos y más bifurcaciones).
+
+    Argumentos:
+        filas, columnas (int): Tamaño del mapa
+        semilla (int|None): Ver generar_laberinto
+
+    Devuelve:
+        Mapa: un mapa nuevo con el laberinto
+    """
+    mapa = Mapa(filas, columnas)
+    for f, fila in enumerate(filas_eller(filas, columnas, semilla)):
+        mapa.celdas[f * columnas:(f + 1) * columnas] = fila
+    mapa.invalidar_indices()
+    mapa.asignar_origen(Coord(1,1))
+    mapa.asignar_destino(destino_laberinto(filas, columnas))
+    return mapa
+
+def escribir_laberinto_eller(ruta, filas, columnas, semilla=None):
+    """Generar un laberinto con el algoritmo de Eller y escribirlo en un
+    archivo de mapa (ver archivo.py) a medida que se genera, sin tenerlo
+    entero en memoria: sirve para laberintos de cualquier cantidad de
+    filas.
+
+    Argumentos:
+        ruta (str): Ruta del archivo
+        filas, columnas (int): Tamaño del mapa
+        semilla (int|None): Ver generar_laberinto
+    """
+    with EscritorMapa(ruta, filas, columnas, Coord(1,1), destino_laberinto(filas, columnas)) as escritor:
+        for fila in filas_eller(filas, columnas, semilla):
+            escritor.escribir_fila(fila)
+
+def filas_eller(filas, columnas, semilla=None):
+    '''Genera un laberinto fila por fila con el algoritmo de Eller.
+
+    Las celdas del laberinto son las de coordenadas impares, como en
+    backtrack. Se recorren las filas de celdas de arriba hacia abajo,
+    recordando sólo a qué conjunto (de celdas conectadas entre sí) pertenece
+    cada celda de la fila actual:
+
+    * se unen al azar celdas vecinas de conjuntos distintos, abriendo la
+      pared entre ellas;
+    * de cada conjunto baja al menos una celda a la fila siguiente (las
+      demás celdas de esa fila empiezan en conjuntos nuevos);
+    * en la última fila se unen todas las celdas de conjuntos distintos.
+
+    Así queda un laberinto perfecto (hay un único camino entre dos celdas
+    cualesquiera), usando memoria proporcional a las columnas y no a las
+    filas.
+
+    Argumentos:
+        filas, columnas (int): Tamaño del mapa
+        semilla (int|None): Ver generar_laberinto
+
+    Devuelve:
+        generador<bytes>: Las ``filas`` filas del mapa, de arriba hacia
+                          abajo, con un byte por celda (1 = bloqueada)
     '''
-    direccion = choice(celdas_vecinas)
-    vecina =  mapa.trasladar_coord(celda, direccion[0], direccion[1])
-    intermedia =  mapa.trasladar_coord(celda, direccion[0] // 2, direccion[1] // 2)
-    return vecina, intermedia
-    def create(self):
-        self.maze = [[1] * self.width for _ in range(self.height)] # full of walls
-        self.start_cell = None
-        self.steps = None
-        self.recursion_depth = None
-        self._visited_cells = []
-        self._visit_cell(self.exit_cell)
-#############ESTE ALGORTIMO HAY QUE MODIFICARLO Y USARLO, FUNCIONA BIEN CON S
- def _visit_cell(self, cell, depth=0):
-    x, y = cell
-    self.maze[y][x] = 0 # remove wall
-    self._visited_cells.append(cell)
-    neighbors = self._get_neighbors(cell)
-    random.shuffle(neighbors)
-    for neighbor in neighbors:
-        if not neighbor in self._visited_cells:
-            self._remove_wall(cell, neighbor)
-            self._visit_cell(neighbor, depth+1)
-    self._update_start_cell(cell, depth)
-
-def _get_neighbors(self, cell):
+    aleatorio = Random(semilla)
+    azar = aleatorio.random
+    # Filas y columnas de celdas del laberinto (mismos límites que backtrack)
+    alto = (filas - 1) // 2
+    ancho = (columnas - 1) // 2
+    bloqueadas = b'\x01' * columnas
+    emitidas = 0
+    if alto > 0 and ancho > 0:
+        yield bloqueadas
+        emitidas += 1
+        # conjuntos[k] es el conjunto de la celda k de la fila actual, y
+        # miembros[conjunto] la lista de sus celdas en la fila actual.
+        conjuntos = list(range(ancho))
+        miembros = {k: [k] for k in range(ancho)}
+        siguiente = ancho
+        for r in range(alto):
+            ultima = r == alto - 1
+            fila = bytearray(bloqueadas)
+            fila[1:2 * ancho:2] = bytes(ancho)
+            for k in range(ancho - 1):
+                a = conjuntos[k]
+                b = conjuntos[k + 1]
+                if a != b and (ultima or azar() < 0.5):
+                    fila[2 * k + 2] = 0
+                    # Se pasan las celdas del conjunto más chico al más grande
+                    if len(miembros[a]) < len(miembros[b]):
+                        a, b = b, a
+                    for j in miembros[b]:
+                        conjuntos[j] = a
+                    miembros[a] += miembros.pop(b)
+            yield bytes(fila)
+            emitidas += 1
+            if ultima:
+                break
+            abajo = bytearray(bloqueadas)
+            nuevos = [-1] * ancho
+            nuevos_miembros = {}
+            for conjunto, celdas in miembros.items():
+                bajan = [k for k in celdas if azar() < 0.5] or [aleatorio.choice(celdas)]
+                for k in bajan:
+                    abajo[2 * k + 1] = 0
+                    nuevos[k] = conjunto
+                nuevos_miembros[conjunto] = bajan
+            for k in range(ancho):
+                if nuevos[k] < 0:
+                    nuevos[k] = siguiente
+                    nuevos_miembros[siguiente] = [k]
+                    siguiente += 1
+            conjuntos = nuevos
+            miembros = nuevos_miembros
+            yield bytes(abajo)
+            emitidas += 1
+    for _ in range(filas - emitidas):
+        yield bloqueadas
+
+class MapaMosaico(Mapa):
+    """
+    Laberinto enorme que no se guarda entero en memoria: está dividido en
+    bloques de ``tam_bloque`` x ``tam_bloque`` celdas, y cada bloque se
+    genera recién cuando se consulta alguna de sus celdas.
+
+    Cada bloque es un laberinto generado con backtrack a partir de una
+    semilla propia (deducida de la semilla del mapa y de la posición del
+    bloque), así que siempre sale igual y no hace falta guardarlo: sólo se
+    conservan los ``max_bloques`` usados más recientemente. Cada bloque abre
+    además una puerta en su borde de arriba y otra en el de la izquierda,
+    hacia los bloques vecinos, así que se puede llegar de cualquier celda a
+    cualquier otra.
+
+    Tiene la misma interfaz de lectura que Mapa (como archivo.MapaArchivo);
+    los métodos que modifican el mapa no están soportados. Los
+    solucionadores que guardan un arreglo por celda del mapa (BFS, A*) no
+    sirven para mapas de este tamaño; IA sí.
+    """
+
+    def __init__(self, bloques_filas, bloques_columnas, semilla=None, tam_bloque=32, max_bloques=4096):
+        """Constructor.
+
+        Argumentos:
+            bloques_filas, bloques_columnas (int): Cantidad de bloques. El
+                mapa tiene ``bloques_filas * tam_bloque + 1`` filas (y lo
+                mismo con las columnas).
+            semilla (int|None): Ver generar_laberinto
+            tam_bloque (int): Lado de cada bloque, en celdas (par)
+            max_bloques (int): Cantidad máxima de bloques en memoria
         """
-        Get the cells next to the cell
-        Example:
-          Given the following mazes
-          The a neighbor's are b
-          # # # # # # #     # # # # # # #
-          # # # b # # #     # a # b # # #
-          # # # # # # #     # # # # # # #
-          # b # a # b #     # b # # # # #
-          # # # # # # #     # # # # # # #
-          # # # b # # #     # # # # # # #
-          # # # # # # #     # # # # # # #
+        if tam_bloque < 4 or tam_bloque % 2:
+            raise ValueError(f'el tamaño de bloque debe ser par y al menos 4, no {tam_bloque}')
+        filas = bloques_filas * tam_bloque + 1
+        columnas = bloques_columnas * tam_bloque + 1
+        self._iniciar(filas, columnas, Coord(1, 1), destino_laberinto(filas, columnas))
+        self.semilla = Random(semilla).getrandbits(64)
+        self.tam_bloque = tam_bloque
+        self.max_bloques = max_bloques
+        self.bloques = OrderedDict()
+        self.celdas = _CeldasMosaico(self)
+
+    def bloque(self, bf, bc):
+        """Celdas del bloque (bf, bc), generándolo si no está en memoria.
+
+        Devuelve:
+            bytes: Un byte por celda (1 = bloqueada), fila por fila
         """
-    x, y = cell
-    neighbors = []
-
-        # Left
-    if x - 2 > 0:
-        neighbors.append((x-2, y))
-        # Right
-    if x + 2 < self.width:
-        neighbors.append((x+2, y))
-        # Up
-    if y - 2 > 0:
-        neighbors.append((x, y-2))
-        # Down
-    if y + 2 < self.height:
-        neighbors.append((x, y+2))
-
-    return neighbors
\ No newline at end of file
+        clave = (bf, bc)
+        celdas = self.bloques.get(clave)
+        if celdas is not None:
+            self.bloques.move_to_end(clave)
+            return celdas
+        celdas = self.generar_bloque(bf, bc)
+        self.bloques[clave] = celdas
+        if len(self.bloques) > self.max_bloques:
+            self.bloques.popitem(last=False)
+        return celdas
+
+    def generar_bloque(self, bf, bc):
+        tam = self.tam_bloque
+        aleatorio = Random(f'{self.semilla}/{bf}/{bc}')
+        # Con una fila y una columna de más, backtrack deja celdas hasta la
+        # fila y columna tam - 1 del bloque.
+        mapa = Mapa(tam + 1, tam + 1)
+        mapa.bloquear_todas()
+        mapa.asignar_origen(Coord(1, 1))
+        for _ in backtrack(mapa, aleatorio):
+            pass
+        celdas = bytearray()
+        for f in range(tam):
+            celdas += mapa.celdas[f * (tam + 1):f * (tam + 1) + tam]
+        # Puertas hacia el bloque de arriba y el de la izquierda
+        if bf > 0:
+            celdas[aleatorio.randrange(1, tam, 2)] = 0
+        if bc > 0:
+            celdas[aleatorio.randrange(1, tam, 2) * tam] = 0
+        return bytes(celdas)
+
+    def desplazamientos_vecinos(self, i):
+        # Sin índice de vecinas: se calculan con las celdas de los bloques
+        return self.desplazamientos[self.calcular_vecindad(i)]
+
+    def tabla_vecinos(self):
+        raise TypeError('MapaMosaico no tiene un índice de vecinas completo')
+
+class _CeldasMosaico:
+    '''Vista de sólo lectura de las celdas de un MapaMosaico, indexada como
+    Mapa.celdas.'''
+    def __init__(self, mapa):
+        self.mapa = mapa
+        self.n = mapa.filas * mapa.columnas
+        self.limite_filas = mapa.filas - 1
+        self.limite_columnas = mapa.columnas - 1
+        # Último bloque consultado, para no buscarlo cada vez
+        self.ultimo = None
+        self.ultimas_celdas = None
+    def __len__(self):
+        return self.n
+    def __getitem__(self, i):
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        f, c = divmod(i, self.mapa.columnas)
+        if f >= self.limite_filas or c >= self.limite_columnas:
+            # Última fila y última columna, fuera de los bloques
+            return 1
+        tam = self.mapa.tam_bloque
+        bf, f = divmod(f, tam)
+        bc, c = divmod(c, tam)
+        if self.ultimo != (bf, bc):
+            self.ultimas_celdas = self.mapa.bloque(bf, bc)
+            self.ultimo = (bf, bc)
+        return self.ultimas_celdas[f * tam + c]
+
+GENERADORES = {
+    'Backtracking': generar_laberinto,
+    'Eller': generar_laberinto_eller,
+}
@@ -0,0 +1,213 @@
+"""Generación y resolución de laberintos por lotes, sin interfaz gráfica.
+
+Ejemplo:
+    $ python lote.py 21x31 101x101 --cantidad 10 --semilla 1 --solucionador BFS
+    $ python lote.py 501x501 --formato csv > resultados.csv
+    $ python lote.py 101x101 --cantidad 10000 --procesos 8 --desordenado
+    $ python lote.py 1001x1001 --generador Eller
+
+Por cada laberinto imprime una línea con sus estadísticas (ver
+resolver_laberinto), en formato JSON (una línea por laberinto) o CSV.
+Con --procesos, los laberintos se reparten entre varios procesos (ver
+resolver_en_paralelo). Con --cache, los laberintos generados se guardan en
+un directorio (ver archivo.py) y las corridas siguientes los cargan de ahí;
+con --soluciones, lo mismo con las soluciones (ver soluciones.py).
+Este módulo no importa tkinter.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache, partial
+from itertools import islice
+from laberinto import GENERADORES
+from ia import SOLUCIONADORES
+from archivo import guardar_mapa, cargar_mapa
+from soluciones import CacheSoluciones, empaquetar_indices
+
+CAMPOS = ['filas', 'columnas', 'semilla', 'generador', 'solucionador', 'celdas', 'pasos',
+          'visitadas', 'largo_camino', 'resuelto', 'tiempo_generacion', 'tiempo_resolucion']
+
+def obtener_laberinto(filas, columnas, semilla, cache=None, generador='Backtracking'):
+    """Genera un laberinto, o lo carga del directorio ``cache`` si ya se
+    había generado antes (y en ese caso lo guarda ahí).
+
+    Argumentos:
+        generador (str): Nombre del generador (ver laberinto.GENERADORES)
+
+    Devuelve:
+        Mapa: El laberinto (ver generar_laberinto)
+    """
+    generar = GENERADORES[generador]
+    if cache is None:
+        return generar(filas, columnas, semilla)
+    sufijo = '' if generador == 'Backtracking' else f'-{generador.lower()}'
+    ruta = os.path.join(cache, f'{filas}x{columnas}-{semilla}{sufijo}.lab')
+    if os.path.exists(ruta):
+        return cargar_mapa(ruta)
+    mapa = generar(filas, columnas, semilla)
+    os.makedirs(cache, exist_ok=True)
+    guardar_mapa(mapa, ruta + '.tmp')
+    os.replace(ruta + '.tmp', ruta)
+    return mapa
+
+def resolver_laberinto(filas, columnas, semilla, solucionador, con_camino=False, cache=None, soluciones=None,
+                       generador='Backtracking'):
+    """Genera un laberinto y lo resuelve.
+
+    Argumentos:
+        filas, columnas (int): Tamaño del laberinto
+        semilla (int): Semilla del laberinto (ver generar_laberinto)
+        solucionador (str): Nombre del solucionador (ver ia.SOLUCIONADORES)
+        con_camino (bool): Si es True, se agrega la clave 'camino' con el
+            camino encontrado, como bytes (ver
+            soluciones.empaquetar_indices) de índices de celdas (ver
+            Mapa.indice).
+        cache (str|None): Directorio de laberintos ya generados (ver
+            obtener_laberinto)
+        soluciones (str|None): Directorio de soluciones ya calculadas (ver
+            soluciones.CacheSoluciones). Si la solución ya estaba, los pasos
+            son los de la búsqueda original y el tiempo de resolución es el
+            de leerla.
+        generador (str): Nombre del generador (ver laberinto.GENERADORES)
+
+    Devuelve:
+        dict: Estadísticas del laberinto, con las claves de CAMPOS. Los tiempos
+              están en segundos.
+    """
+    t0 = time.perf_counter()
+    mapa = obtener_laberinto(filas, columnas, semilla, cache, generador)
+    t1 = time.perf_counter()
+    if soluciones is None:
+        ia = SOLUCIONADORES[solucionador](mapa)
+        camino = ia.resolver()
+    else:
+        ia = _cache_soluciones(soluciones).resolver(mapa, solucionador)
+        camino = ia.camino()
+    t2 = time.perf_counter()
+    resultado = {
+        'filas': filas,
+        'columnas': columnas,
+        'semilla': semilla,
+        'generador': generador,
+        'solucionador': solucionador,
+        'celdas': filas * columnas,
+        'pasos': ia.pasos,
+        'visitadas': len(ia.visitados()),
+        'largo_camino': largo_camino(mapa, camino),
+        'resuelto': ia.coord_jugador() == mapa.destino(),
+        'tiempo_generacion': round(t1 - t0, 6),
+        'tiempo_resolucion': round(t2 - t1, 6),
+    }
+    if con_camino:
+        resultado['camino'] = empaquetar_indices(mapa.indice(coord) for coord in camino)
+    return resultado
+
+def largo_camino(mapa, camino):
+    """Cantidad de celdas distintas de un camino, contando el origen.
+
+    Se cuenta igual para todos los solucionadores: el camino de IA no
+    incluye el origen y repite celdas (una vez por cada vez que se apiló),
+    y el de las búsquedas incluye el origen."""
+    celdas = set(camino)
+    celdas.add(mapa.origen())
+    return len(celdas)
+
+@lru_cache(maxsize=None)
+def _cache_soluciones(directorio):
+    # Una cache por directorio y por proceso
+    return CacheSoluciones(directorio=directorio)
+
+def _resolver_bloque(bloque, solucionador, con_camino, cache, soluciones, generador):
+    return [resolver_laberinto(filas, columnas, semilla, solucionador, con_camino, cache, soluciones, generador)
+            for filas, columnas, semilla in bloque]
+
+def resolver_en_paralelo(trabajos, solucionador, procesos=None, ordenado=True, tam_bloque=64, con_camino=False, cache=None, soluciones=None,
+                          generador='Backtracking'):
+    """Genera y resuelve muchos laberintos repartiéndolos en varios procesos.
+
+    Los trabajos se envían a los procesos en bloques de ``tam_bloque``, y
+    cada proceso devuelve sólo los diccionarios de resolver_laberinto (el
+    camino, si se pide, viaja como bytes), nunca mapas ni Coords.
+
+    Argumentos:
+        trabajos (iterable<(int, int, int)>): Tuplas (filas, columnas,
+            semilla), por ejemplo las de trabajos()
+        solucionador (str): Nombre del solucionador (ver ia.SOLUCIONADORES)
+        procesos (int|None): Cantidad de procesos (None: uno por núcleo)
+        ordenado (bool): Si es True, los resultados se devuelven en el orden
+            de los trabajos; si no, a medida que cada bloque termina.
+        tam_bloque (int): Trabajos por envío a un proceso
+        con_camino, cache, soluciones, generador: Ver resolver_laberinto
+
+    Devuelve:
+        generador<dict>: Los resultados de resolver_laberinto
+    """
+    trabajos = iter(trabajos)
+    bloques = iter(lambda: list(islice(trabajos, tam_bloque)), [])
+    tarea = partial(_resolver_bloque, solucionador=solucionador, con_camino=con_camino, cache=cache,
+                    soluciones=soluciones, generador=generador)
+    with ProcessPoolExecutor(procesos) as ejecutor:
+        if ordenado:
+            for resultados in ejecutor.map(tarea, bloques):
+                yield from resultados
+        else:
+            for futuro in as_completed([ejecutor.submit(tarea, bloque) for bloque in bloques]):
+                yield from futuro.result()
+
+def tamano(texto):
+    """Convierte un tamaño de la forma ``FILASxCOLUMNAS`` en una tupla (int, int)."""
+    try:
+        filas, columnas = texto.lower().split('x')
+        return int(filas), int(columnas)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'tamaño inválido: {texto!r} (se espera FILASxCOLUMNAS)')
+
+def trabajos(tamanos, cantidad, semilla):
+    """Genera las tuplas (filas, columnas, semilla) a procesar: ``cantidad``
+    laberintos de cada tamaño, con semillas consecutivas a partir de ``semilla``."""
+    for filas, columnas in tamanos:
+        for i in range(cantidad):
+            yield filas, columnas, semilla + i
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Genera y resuelve laberintos sin interfaz gráfica.')
+    parser.add_argument('tamanos', nargs='+', type=tamano, metavar='FILASxCOLUMNAS')
+    parser.add_argument('--cantidad', type=int, default=1, help='laberintos por tamaño (default: 1)')
+    parser.add_argument('--semilla', type=int, default=0, help='semilla del primer laberinto (default: 0)')
+    parser.add_argument('--solucionador', choices=list(SOLUCIONADORES), default='BFS')
+    parser.add_argument('--generador', choices=list(GENERADORES), default='Backtracking')
+    parser.add_argument('--formato', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('--procesos', type=int, default=1,
+                        help='procesos a usar (0: uno por núcleo; default: 1)')
+    parser.add_argument('--desordenado', action='store_true',
+                        help='con varios procesos, imprimir los resultados a medida que terminan')
+    parser.add_argument('--cache', metavar='DIRECTORIO', help='guardar y reutilizar los laberintos generados')
+    parser.add_argument('--soluciones', metavar='DIRECTORIO', help='guardar y reutilizar las soluciones')
+    args = parser.parse_args(argv)
+
+    if args.formato == 'csv':
+        escritor = csv.DictWriter(sys.stdout, fieldnames=CAMPOS)
+        escritor.writeheader()
+        escribir = escritor.writerow
+    else:
+        escribir = lambda fila: print(json.dumps(fila))
+
+    lista = trabajos(args.tamanos, args.cantidad, args.semilla)
+    if args.procesos == 1:
+        resultados = (resolver_laberinto(filas, columnas, semilla, args.solucionador, cache=args.cache,
+                                         soluciones=args.soluciones, generador=args.generador)
+                      for filas, columnas, semilla in lista)
+    else:
+        resultados = resolver_en_paralelo(lista, args.solucionador, args.procesos or None,
+                                          ordenado=not args.desordenado, cache=args.cache,
+                                          soluciones=args.soluciones, generador=args.generador)
+    for resultado in resultados:
+        escribir(resultado)
+        sys.stdout.flush()
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,30 @@
-class Coord:
+from hashlib import blake2b
+from operator import itemgetter
+import struct
+
+class Coord(tuple):
     """
     Representa las coordenadas de una celda en una grilla 2D, representada
     como filas y columnas. Las coordendas ``fila = 0, columna = 0`` corresponden
     a la celda de arriba a la izquierda.
 
-    Las instancias de Coord son inmutables.
+    Las instancias de Coord son inmutables. Son tuplas ``(fila, columna)``
+    sin atributos propios (``__slots__`` vacío), así que ocupan lo mismo que
+    una tupla de dos elementos, y la igualdad y el hash son los de la tupla.
     """
 
-    def __init__(self, fila=0, columna=0):
+    __slots__ = ()
+
+    def __new__(cls, fila=0, columna=0):
         """Constructor.
 
         Argumentos:
             fila, columna (int): Coordenadas de la celda
         """
-        self.fila = fila
-        self.columna = columna
+        return tuple.__new__(cls, (fila, columna))
+
+    fila = property(itemgetter(0), doc='Fila de la celda')
+    columna = property(itemgetter(1), doc='Columna de la celda')
 
     def trasladar(self, df, dc):
         """Trasladar una celda.
@@ -29,7 +39,8 @@ class Coord:
         Devuelve:
             Coord: Las coordenadas de la celda trasladada
         """
-        return Coord(self.fila + df, self.columna + dc)
+        f, c = self
+        return tuple.__new__(Coord, (f + df, c + dc))
 
     def distancia(self, otra):
         """Distancia entre dos celdas.
@@ -40,34 +51,15 @@ class Coord:
         Devuelve:
             int|float: La distancia entre las dos celdas (no negativo)
         """
-        return ((self.fila - otra.fila) ** 2 + (self.columna - otra.columna) ** 2) ** 0.5
-
-    def __eq__(self, otra):
-        """Determina si dos coordenadas son iguales"""
-        return self.fila == otra.fila and self.columna == otra.columna
-
-    def __iter__(self):
-        """Iterar las componentes de la coordenada.
-
-        Devuelve un iterador de forma tal que:
-        >>> coord = Coord(3, 5)
-        >>> f, c = coord
-        >>> assert f == 3
-        >>> assert c == 5
-        """
-        return iter((self.fila, self.columna))
+        return ((self[0] - otra[0]) ** 2 + (self[1] - otra[1]) ** 2) ** 0.5
 
-    def __hash__(self):
-        """Código "hash" de la instancia inmutable."""
-        # Este método es llamado por la función de Python hash(objeto), y debe devolver
-        # un número entero.
-        # Más información (y un ejemplo de cómo implementar la funcion) en:
-        # https://docs.python.org/3/reference/datamodel.html#object.__hash__
-        return hash((self.fila, self.columna))
+    def __getnewargs__(self):
+        # Para copy y pickle: Coord(fila, columna), no Coord((fila, columna))
+        return tuple(self)
 
     def __repr__(self):
         """Representación de la coordenada como cadena de texto"""
-        return f'Coord({self.fila}, {self.columna})'
+        return f'Coord({self[0]}, {self[1]})'
 
 class Mapa:
     """
@@ -77,6 +69,8 @@ class Mapa:
     * una celda origen
     * una celda destino
     * 0 o más celdas "bloqueadas", que representan las paredes del laberinto
+    * un costo para entrar a cada celda (por defecto 1), que representa el
+      terreno (barro, puertas, etc.)
 
     Las instancias de Mapa son mutables.
     """
@@ -89,11 +83,28 @@ class Mapa:
         Argumentos:
             filas, columnas (int): Tamaño del mapa
         """
+        self._iniciar(filas, columnas, Coord(), Coord(filas - 1, columnas - 1))
+        # Una celda por byte, indexada por ``fila * columnas + columna``.
+        # 0 = desbloqueada, 1 = bloqueada.
+        self.celdas = bytearray(filas * columnas)
+
+    def _iniciar(self, filas, columnas, origen, destino):
+        """Inicializa todo menos las celdas. Las subclases que guardan las
+        celdas de otra forma (ver archivo.MapaArchivo y
+        laberinto.MapaMosaico) lo llaman en lugar de Mapa.__init__."""
         self.filas = filas
         self.columnas = columnas
-        self.coord_origen = Coord()
-        self.coord_destino = Coord(filas - 1, columnas - 1)
-        self.paredes = set()
+        self.coord_origen = origen
+        self.coord_destino = destino
+        self.vecindad = None
+        self.desplazamientos = tabla_desplazamientos(columnas)
+        # Coords compartidas, por índice de celda (ver compartir_coords)
+        self.coords = None
+        # Huella de cada bloque de TAM_BLOQUE_HUELLA celdas (ver huella)
+        self.huellas = None
+        # Costo de cada celda, un byte por celda como ``celdas``, o None si
+        # todas cuestan 1 (ver asignar_costo)
+        self.costos = None
 
     def dimension(self):
         """Dimensiones del mapa (filas y columnas).
@@ -145,7 +156,8 @@ class Mapa:
         Devuelve:
             bool: True si la celda está bloqueada
         """
-        return coord in self.paredes
+        i = self.indice(coord)
+        return i is not None and self.celdas[i] != 0
 
     def bloquear(self, coord):
         """Bloquear una celda.
@@ -155,8 +167,9 @@ class Mapa:
         Argumentos:
             coord (Coord): Coordenadas de la celda a bloquear
         """
-        if coord not in self.paredes:
-            self.paredes.add(coord)
+        i = self.indice(coord)
+        if i is not None:
+            self.bloquear_indice(i)
 
     def desbloquear(self, coord):
         """Desbloquear una celda.
@@ -166,8 +179,9 @@ class Mapa:
         Argumentos:
             coord (Coord): Coordenadas de la celda a desbloquear
         """
-        if coord in self.paredes:
-            self.paredes.remove(coord)
+        i = self.indice(coord)
+        if i is not None:
+            self.desbloquear_indice(i)
 
     def alternar_bloque(self, coord):
         """Alternar entre celda bloqueada y desbloqueada.
@@ -177,10 +191,281 @@ class Mapa:
         Argumentos:
             coord (Coord): Coordenadas de la celda a alternar
         """
-        if coord in self.paredes:
-            self.paredes.remove(coord)
+        i = self.indice(coord)
+        if i is None:
+            return
+        if self.celdas[i]:
+            self.desbloquear_indice(i)
         else:
-            self.paredes.add(coord)
+            self.bloquear_indice(i)
+
+    def costo(self, coord):
+        """Costo de entrar a una celda.
+
+        Argumentos:
+            coord (Coord): Coordenadas de la celda
+
+        Devuelve:
+            int: El costo, entre 1 y COSTO_MAXIMO (1 si la celda está fuera
+                 del mapa)
+        """
+        i = self.indice(coord)
+        if i is None or self.costos is None:
+            return 1
+        return self.costos[i]
+
+    def asignar_costo(self, coord, costo):
+        """Asignar el costo de entrar a una celda. No cambia si la celda está
+        bloqueada.
+
+        Argumentos:
+            coord (Coord): Coordenadas de la celda
+            costo (int): El costo, entre 1 y COSTO_MAXIMO
+        """
+        if not 1 <= costo <= COSTO_MAXIMO:
+            raise ValueError(f'costo inválido: {costo}')
+        i = self.indice(coord)
+        if i is None or self.costo(coord) == costo:
+            return
+        if self.costos is None:
+            self.costos = self.tabla_costos()
+            # Los costos pasan a ser parte de la huella
+            self.huellas = None
+        self.costos[i] = costo
+        if self.huellas is not None:
+            self.huellas[i // TAM_BLOQUE_HUELLA] = None
+
+    def tabla_costos(self):
+        """Costos de todas las celdas.
+
+        Devuelve:
+            bytearray: El costo de cada celda, indexado como ``celdas``. Si
+                no se asignó ningún costo, es una tabla nueva con todas las
+                celdas en 1.
+        """
+        if self.costos is None:
+            return bytearray(b'\x01') * (self.filas * self.columnas)
+        return self.costos
+
+    def bloquear_todas(self):
+        """Bloquear todas las celdas del mapa de una sola vez."""
+        self.celdas[:] = b'\x01' * len(self.celdas)
+        self.invalidar_indices()
+
+    def indice(self, coord):
+        """Índice de una celda en el arreglo interno del mapa.
+
+        Argumentos:
+            coord (Coord): Coordenadas de la celda
+
+        Devuelve:
+            int|None: ``fila * columnas + columna``, o None si la celda está
+                      fuera del mapa
+        """
+        f, c = coord
+        if 0 <= f < self.filas and 0 <= c < self.columnas:
+            return f * self.columnas + c
+        return None
+
+    def coord_de_indice(self, i):
+        """Coordenadas de la celda con el índice dado (inversa de indice()).
+
+        Argumentos:
+            i (int): Índice de la celda
+
+        Devuelve:
+            Coord: Las coordenadas de la celda
+        """
+        coords = self.coords
+        if coords is None:
+            return Coord(*divmod(i, self.columnas))
+        coord = coords.get(i)
+        if coord is None:
+            if len(coords) >= self.max_coords:
+                coords.clear()
+            coord = coords[i] = Coord(*divmod(i, self.columnas))
+        return coord
+
+    def coord(self, fila, columna):
+        """Coordenadas de una celda: igual que ``Coord(fila, columna)``, pero
+        si el mapa comparte sus coordenadas (ver compartir_coords) devuelve
+        siempre la misma instancia para la misma celda.
+
+        Devuelve:
+            Coord: Las coordenadas de la celda
+        """
+        coords = self.coords
+        if coords is None or not (0 <= fila < self.filas and 0 <= columna < self.columnas):
+            return Coord(fila, columna)
+        i = fila * self.columnas + columna
+        coord = coords.get(i)
+        if coord is None:
+            if len(coords) >= self.max_coords:
+                coords.clear()
+            coord = coords[i] = Coord(fila, columna)
+        return coord
+
+    def compartir_coords(self, maximo=65536):
+        """Hace que el mapa reutilice las instancias de Coord que devuelve
+        (coord, coord_de_indice y trasladar_coord) en lugar de crear una
+        nueva cada vez.
+
+        Cada Coord se crea la primera vez que se pide y después se guarda en
+        un diccionario por índice de celda. Conviene cuando se piden muchas
+        veces las mismas celdas, por ejemplo al dibujar o al guardar celdas
+        en conjuntos.
+
+        Argumentos:
+            maximo (int): Cantidad máxima de Coords guardadas; al llegar a
+                esa cantidad se descartan todas y se vuelve a empezar, para
+                que la memoria usada no dependa del tamaño del mapa.
+        """
+        self.max_coords = maximo
+        if self.coords is None:
+            self.coords = {}
+
+    def indice_bloqueado(self, i):
+        """Igual que celda_bloqueada(), pero recibe el índice de la celda."""
+        return self.celdas[i] != 0
+
+    def bloquear_indice(self, i):
+        """Igual que bloquear(), pero recibe el índice de la celda."""
+        if not self.celdas[i]:
+            self.celdas[i] = 1
+            self.celda_modificada(i)
+
+    def desbloquear_indice(self, i):
+        """Igual que desbloquear(), pero recibe el índice de la celda."""
+        if self.celdas[i]:
+            self.celdas[i] = 0
+            self.celda_modificada(i)
+
+    def desplazamientos_vecinos(self, i):
+        """Celdas vecinas desbloqueadas de una celda.
+
+        Se consideran vecinas las celdas de abajo, derecha, arriba e izquierda
+        (en ese orden), con los mismos límites que trasladar_coord. El
+        resultado sale de un índice que se construye la primera vez que se
+        usa y se mantiene al bloquear y desbloquear celdas, así que no se
+        crea ningún objeto nuevo.
+
+        Argumentos:
+            i (int): Índice de la celda (ver indice())
+
+        Devuelve:
+            tuple<int>: Los desplazamientos ``d`` tales que ``i + d`` es el
+                        índice de una vecina desbloqueada
+        """
+        if self.vecindad is None:
+            self.construir_vecindad()
+        return self.desplazamientos[self.vecindad[i]]
+
+    def tabla_vecinos(self):
+        """Índice de vecinas completo, para recorridos que necesitan evitar
+        llamadas a métodos por celda.
+
+        Devuelve:
+            (bytearray, list<tuple<int>>): ``vecindad, desplazamientos``, tales
+                que desplazamientos_vecinos(i) == desplazamientos[vecindad[i]]
+        """
+        if self.vecindad is None:
+            self.construir_vecindad()
+        return self.vecindad, self.desplazamientos
+
+    def invalidar_indices(self):
+        """Descarta el índice de vecinas y la huella del mapa. Hay que
+        llamarlo después de modificar ``celdas`` directamente (sin bloquear,
+        desbloquear, etc.)."""
+        self.vecindad = None
+        self.huellas = None
+
+    def celda_modificada(self, i):
+        """Actualiza el índice de vecinas y la huella después de bloquear o
+        desbloquear la celda ``i``."""
+        self.actualizar_vecindad(i)
+        if self.huellas is not None:
+            self.huellas[i // TAM_BLOQUE_HUELLA] = None
+
+    def huella(self):
+        """Huella del contenido del mapa: dimensiones, celdas bloqueadas,
+        costos (si se asignó alguno), origen y destino.
+
+        Dos mapas con el mismo contenido tienen la misma huella. Las celdas
+        se resumen por bloques de TAM_BLOQUE_HUELLA; al bloquear o desbloquear
+        una celda sólo se vuelve a calcular el resumen de su bloque, así que
+        pedir la huella después de editar el mapa es barato.
+
+        Devuelve:
+            str: La huella, en hexadecimal
+        """
+        n = self.filas * self.columnas
+        if self.huellas is None:
+            self.huellas = [None] * -(-n // TAM_BLOQUE_HUELLA)
+        huellas = self.huellas
+        for b, h in enumerate(huellas):
+            if h is None:
+                inicio = b * TAM_BLOQUE_HUELLA
+                fin = min(n, inicio + TAM_BLOQUE_HUELLA)
+                datos = bytes(self.celdas[inicio:fin])
+                if self.costos is not None:
+                    datos += self.costos[inicio:fin]
+                huellas[b] = blake2b(datos, digest_size=16).digest()
+        encabezado = struct.pack('<6q', self.filas, self.columnas, *self.coord_origen, *self.coord_destino)
+        return blake2b(encabezado + b''.join(huellas), digest_size=16).hexdigest()
+
+    def construir_vecindad(self):
+        """Construye el índice de vecinas: un byte por celda, con un bit por
+        cada vecina desbloqueada (ver tabla_desplazamientos)."""
+        filas, columnas = self.filas, self.columnas
+        vecindad = bytearray(filas * columnas)
+        if columnas < 2:
+            # Ninguna celda tiene vecinas válidas con menos de dos columnas
+            self.vecindad = vecindad
+            return
+        # Cada fila se arma sumando, como enteros de un byte por celda, las
+        # filas de celdas libres desplazadas en cada dirección. Igual que en
+        # es_coord_valida, la última fila y la última columna no son válidas.
+        libres = [bytes(self.celdas[f * columnas:columnas * f + columnas - 1]).translate(_LIBRES) + b'\x00'
+                  for f in range(filas)]
+        ceros = bytes(columnas)
+        for f in range(filas):
+            fila = libres[f] if f < filas - 1 else ceros
+            abajo = libres[f + 1] if f + 1 < filas - 1 else ceros
+            derecha = fila[1:columnas - 1] + b'\x00\x00'
+            arriba = libres[f - 1] if f > 0 else ceros
+            izquierda = b'\x00' + fila[:columnas - 1]
+            bits = (int.from_bytes(abajo, 'little') + 2 * int.from_bytes(derecha, 'little')
+                    + 4 * int.from_bytes(arriba, 'little') + 8 * int.from_bytes(izquierda, 'little'))
+            vecindad[f * columnas:(f + 1) * columnas] = bits.to_bytes(columnas, 'little')
+        self.vecindad = vecindad
+
+    def actualizar_vecindad(self, i):
+        """Actualiza el índice de vecinas de las celdas vecinas de ``i``,
+        después de que ``i`` se bloqueó o desbloqueó."""
+        if self.vecindad is None:
+            return
+        f, c = divmod(i, self.columnas)
+        for df, dc in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+            if 0 <= f + df < self.filas and 0 <= c + dc < self.columnas:
+                self.vecindad[i + df * self.columnas + dc] = self.calcular_vecindad(i + df * self.columnas + dc)
+
+    def calcular_vecindad(self, i):
+        filas, columnas = self.filas, self.columnas
+        celdas = self.celdas
+        f, c = divmod(i, columnas)
+        bits = 0
+        # Mismos límites que es_coord_valida
+        if c < columnas - 1:
+            if f + 1 < filas - 1 and not celdas[i + columnas]:
+                bits |= 1
+            if f > 0 and not celdas[i - columnas]:
+                bits |= 4
+        if f < filas - 1:
+            if c + 1 < columnas - 1 and not celdas[i + 1]:
+                bits |= 2
+            if c > 0 and not celdas[i - 1]:
+                bits |= 8
+        return bits
 
     def es_coord_valida(self, coord):
         """¿Las coordenadas están dentro del mapa?
@@ -204,9 +489,11 @@ class Mapa:
             Coord: La coordenada trasladada si queda dentro del mapa. En caso
                    contrario, devuelve la coordenada recibida.
         """
-        nueva_coord = coord.trasladar(df, dc)
-        if self.es_coord_valida(nueva_coord):
-            return nueva_coord
+        f = coord[0] + df
+        c = coord[1] + dc
+        # Mismos límites que es_coord_valida
+        if 0 <= f < self.filas - 1 and 0 <= c < self.columnas - 1:
+            return self.coord(f, c)
         return coord
 
     def __iter__(self):
@@ -222,6 +509,20 @@ class Mapa:
         """
         return _Iteradormapa(self.filas, self.columnas)
 
+# Celdas por bloque de la huella del mapa (ver Mapa.huella)
+TAM_BLOQUE_HUELLA = 1 << 14
+# Máximo costo de una celda (ver Mapa.asignar_costo): entra en un byte.
+COSTO_MAXIMO = 255
+
+_LIBRES = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+def tabla_desplazamientos(columnas, orden=(1, 2, 4, 8)):
+    '''Para cada combinación de bits de vecindad (1: abajo, 2: derecha,
+    4: arriba, 8: izquierda), la tupla de desplazamientos de índice de esas
+    vecinas, con las direcciones en el orden de los bits de ``orden``.'''
+    desplazamiento = {1: columnas, 2: 1, 4: -columnas, 8: -1}
+    return [tuple(desplazamiento[bit] for bit in orden if bits & bit) for bits in range(16)]
+
 class _Iteradormapa:
     '''Clase del iterador de mapa, recorre este por coordenads a 
     usando los indices de cada valor posible de filas y columnas.
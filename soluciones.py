@@ -0,0 +1,186 @@
+"""Cache de soluciones de laberintos.
+
+Las soluciones se guardan por huella del mapa (ver Mapa.huella) y nombre del
+solucionador, así que resolver otra vez un mapa con el mismo contenido (el
+mismo mapa del editor, o el mismo laberinto en otra corrida de lote.py) no
+repite la búsqueda.
+
+Ejemplo:
+    >>> cache = CacheSoluciones(directorio='soluciones')
+    >>> solucion = cache.resolver(mapa, 'BFS')
+    >>> solucion.camino()
+
+Formato de los archivos del directorio: un encabezado ENCABEZADO (MAGICO,
+versión, celda final del jugador, pasos y largo de cada lista) seguido de
+los índices de las celdas visitadas y de las del camino, como enteros de 8
+bytes little-endian.
+"""
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from ia import SOLUCIONADORES, Solucion
+
+MAGICO = b'SOL3'
+VERSION = 1
+ENCABEZADO = struct.Struct('<4sHHqqqq')
+
+class CacheSoluciones:
+    """
+    Cache de soluciones (ver ia.Solucion), con una cantidad acotada de
+    celdas en memoria: al pasarse, se descartan las soluciones usadas hace
+    más tiempo. Si se indica un directorio, además se guardan ahí y se
+    buscan ahí las que no están en memoria.
+    """
+
+    def __init__(self, max_celdas=1 << 22, directorio=None):
+        """Constructor.
+
+        Argumentos:
+            max_celdas (int): Máximo de índices de celdas (visitadas más
+                camino) guardados en memoria, entre todas las soluciones
+            directorio (str|None): Directorio donde guardar las soluciones
+        """
+        self.max_celdas = max_celdas
+        self.directorio = directorio
+        self.soluciones = OrderedDict()
+        self.celdas = 0
+
+    def clave(self, mapa, solucionador):
+        """Clave de la solución de un mapa con un solucionador.
+
+        Argumentos:
+            mapa (Mapa): El mapa
+            solucionador (str): Nombre del solucionador (ver ia.SOLUCIONADORES)
+
+        Devuelve:
+            str: La clave, que sirve también como nombre de archivo
+        """
+        return f'{mapa.huella()}-{solucionador.encode().hex()}'
+
+    def obtener(self, mapa, solucionador, clave=None):
+        """Busca una solución guardada.
+
+        Argumentos:
+            mapa (Mapa): El mapa
+            solucionador (str): Nombre del solucionador
+            clave (str|None): La clave (ver clave()), si ya se calculó
+
+        Devuelve:
+            Solucion|None: La solución, asociada a ``mapa``, o None si no
+                           está guardada
+        """
+        if clave is None:
+            clave = self.clave(mapa, solucionador)
+        solucion = self.soluciones.get(clave)
+        if solucion is not None:
+            self.soluciones.move_to_end(clave)
+        elif self.directorio is not None:
+            solucion = self.leer(clave, mapa)
+            if solucion is None:
+                return None
+            self.agregar(clave, solucion)
+        else:
+            return None
+        return solucion.con_mapa(mapa)
+
+    def guardar(self, ia, clave=None):
+        """Guarda la solución de un solucionador que ya terminó.
+
+        Argumentos:
+            ia: El solucionador (IA, BFS, etc.)
+            clave (str|None): La clave (ver clave()). Hay que pasarla si el
+                mapa se pudo haber modificado desde que se empezó a resolver.
+
+        Devuelve:
+            Solucion: La solución guardada
+        """
+        if clave is None:
+            clave = self.clave(ia.mapa, _nombre(ia))
+        solucion = ia if isinstance(ia, Solucion) else Solucion.de_solucionador(ia)
+        self.agregar(clave, solucion)
+        if self.directorio is not None:
+            self.escribir(clave, solucion)
+        return solucion
+
+    def resolver(self, mapa, solucionador):
+        """Devuelve la solución guardada, o resuelve el mapa y la guarda.
+
+        Devuelve:
+            Solucion: La solución, asociada a ``mapa``
+        """
+        clave = self.clave(mapa, solucionador)
+        solucion = self.obtener(mapa, solucionador, clave)
+        if solucion is None:
+            ia = SOLUCIONADORES[solucionador](mapa)
+            ia.resolver()
+            solucion = self.guardar(ia, clave)
+        return solucion
+
+    def agregar(self, clave, solucion):
+        anterior = self.soluciones.pop(clave, None)
+        if anterior is not None:
+            self.celdas -= _tamano(anterior)
+        self.soluciones[clave] = solucion
+        self.celdas += _tamano(solucion)
+        while self.celdas > self.max_celdas and len(self.soluciones) > 1:
+            _, descartada = self.soluciones.popitem(last=False)
+            self.celdas -= _tamano(descartada)
+
+    def ruta(self, clave):
+        return os.path.join(self.directorio, clave + '.sol')
+
+    def leer(self, clave, mapa):
+        try:
+            with open(self.ruta(clave), 'rb') as archivo:
+                datos = archivo.read()
+        except FileNotFoundError:
+            return None
+        if len(datos) < ENCABEZADO.size:
+            return None
+        magico, version, _, actual, pasos, n_visitados, n_camino = ENCABEZADO.unpack_from(datos)
+        if magico != MAGICO or version != VERSION or len(datos) != ENCABEZADO.size + 8 * (n_visitados + n_camino):
+            return None
+        indices = desempaquetar_indices(datos[ENCABEZADO.size:])
+        return Solucion(mapa, actual, pasos, array('l', indices[:n_visitados]), array('l', indices[n_visitados:]))
+
+    def escribir(self, clave, solucion):
+        os.makedirs(self.directorio, exist_ok=True)
+        indices = array('q', solucion.indices_visitados)
+        indices.fromlist(solucion.indices_camino.tolist())
+        ruta = self.ruta(clave)
+        with open(ruta + '.tmp', 'wb') as archivo:
+            archivo.write(ENCABEZADO.pack(MAGICO, VERSION, 0, solucion.actual, solucion.pasos,
+                                          len(solucion.indices_visitados), len(solucion.indices_camino)))
+            archivo.write(empaquetar_indices(indices))
+        os.replace(ruta + '.tmp', ruta)
+
+def empaquetar_indices(indices):
+    """Convierte índices de celdas (ver Mapa.indice) en bytes: enteros de 8
+    bytes little-endian, en cualquier plataforma."""
+    indices = array('q', indices)
+    if sys.byteorder == 'big':
+        indices.byteswap()
+    return indices.tobytes()
+
+def desempaquetar_indices(datos):
+    """Inversa de empaquetar_indices.
+
+    Devuelve:
+        array<int>: Los índices, en un array('q')
+    """
+    indices = array('q')
+    indices.frombytes(datos)
+    if sys.byteorder == 'big':
+        indices.byteswap()
+    return indices
+
+def _tamano(solucion):
+    return len(solucion.indices_visitados) + len(solucion.indices_camino)
+
+def _nombre(ia):
+    for nombre, clase in SOLUCIONADORES.items():
+        if type(ia) is clase:
+            return nombre
+    raise ValueError(f'solucionador desconocido: {type(ia).__name__}')
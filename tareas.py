@@ -0,0 +1,100 @@
+"""Trabajo en segundo plano para la interfaz gráfica.
+
+Este módulo no importa tkinter: una Tarea corre en otro hilo y sólo se
+comunica con la interfaz a través de una cola, que la interfaz revisa con
+after() a su propio ritmo.
+
+Ejemplo:
+    >>> tarea = Tarea(pasos)
+    >>> def revisar():
+    ...     for paso in tarea.recibir():
+    ...         dibujar(paso)
+    ...     if not tarea.terminada:
+    ...         ventana.after(20, revisar)
+"""
+import queue
+import threading
+
+class Tarea:
+    """
+    Recorre un iterable en un hilo aparte y deja sus elementos, en lotes, en
+    una cola acotada. El hilo de la interfaz los saca con recibir() sin
+    bloquearse nunca.
+    """
+
+    # Marca el final de la cola
+    FIN = object()
+
+    def __init__(self, iterable, tam_lote=256, max_lotes=64):
+        """Constructor. Empieza a recorrer el iterable enseguida.
+
+        Argumentos:
+            iterable: Lo que se recorre en el otro hilo (por ejemplo, un
+                generador que hace el trabajo de a poco)
+            tam_lote (int): Máximo de elementos por lote. Si la cola está
+                vacía, el lote se envía antes de llenarse.
+            max_lotes (int): Máximo de lotes en la cola; si se llena, el
+                otro hilo espera a que la interfaz saque alguno.
+        """
+        self.cola = queue.Queue(max_lotes)
+        self.cancelada = threading.Event()
+        # Se vuelve True cuando recibir() encuentra el final de la cola
+        self.terminada = False
+        self.error = None
+        self.hilo = threading.Thread(target=self.correr, args=(iterable, tam_lote), daemon=True)
+        self.hilo.start()
+
+    def correr(self, iterable, tam_lote):
+        lote = []
+        try:
+            for elemento in iterable:
+                if self.cancelada.is_set():
+                    return
+                lote.append(elemento)
+                if len(lote) >= tam_lote or self.cola.empty():
+                    self.poner(lote)
+                    lote = []
+            if lote:
+                self.poner(lote)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.poner(Tarea.FIN)
+
+    def poner(self, elemento):
+        # Espera lugar en la cola, salvo que se cancele la tarea
+        while not self.cancelada.is_set():
+            try:
+                self.cola.put(elemento, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def recibir(self):
+        """Saca de la cola todo lo que haya, sin esperar.
+
+        Devuelve:
+            list: Los elementos recibidos, en orden (puede estar vacía)
+
+        Si el iterable lanzó una excepción, se relanza acá cuando se llega
+        al final de la cola.
+        """
+        elementos = []
+        while not self.terminada:
+            try:
+                lote = self.cola.get_nowait()
+            except queue.Empty:
+                break
+            if lote is Tarea.FIN:
+                self.terminada = True
+                if self.error is not None:
+                    raise self.error
+            else:
+                elementos.extend(lote)
+        return elementos
+
+    def cancelar(self):
+        """Pide al otro hilo que deje de recorrer el iterable (lo hace
+        antes de pedir el siguiente elemento). La tarea puede no llegar a marcarse
+        como terminada."""
+        self.cancelada.set()
@@ -0,0 +1,184 @@
+"""Pruebas de los solucionadores incrementales de ia.py (PlanificadorIncremental
+y Conectividad).
+
+Después de cada edición al azar (bloquear y desbloquear celdas de a una o
+de a varias, cambiar costos, y mover el origen y el destino), se compara el
+resultado con una búsqueda hecha desde cero (en anchura, o Dijkstra para el
+costo del camino), que sólo usa trasladar_coord, celda_bloqueada y costo
+(no el índice de vecinas del mapa).
+
+Ejemplo:
+    $ python -m unittest test_ia
+"""
+import random
+import unittest
+from collections import deque
+from heapq import heappush, heappop
+from mapa import Mapa, COSTO_MAXIMO
+from laberinto import generar_laberinto
+from ia import PlanificadorIncremental, Conectividad
+
+# Ediciones al azar por mapa de prueba
+EDICIONES = 200
+DIRECCIONES = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+def vecinas(mapa, coord):
+    """Celdas desbloqueadas a las que se puede mover desde ``coord``."""
+    resultado = []
+    for df, dc in DIRECCIONES:
+        vecina = mapa.trasladar_coord(coord, df, dc)
+        if vecina != coord and not mapa.celda_bloqueada(vecina):
+            resultado.append(vecina)
+    return resultado
+
+def distancias(mapa):
+    """Distancia desde el origen de cada celda a la que se puede llegar.
+
+    Devuelve:
+        dict<Coord, int>: Las distancias (el origen está, aunque esté
+                          bloqueado)
+    """
+    origen = mapa.origen()
+    distancia = {origen: 0}
+    pendientes = deque([origen])
+    while pendientes:
+        coord = pendientes.popleft()
+        for vecina in vecinas(mapa, coord):
+            if vecina not in distancia:
+                distancia[vecina] = distancia[coord] + 1
+                pendientes.append(vecina)
+    return distancia
+
+def costos_minimos(mapa):
+    """Menor costo desde el origen (entrar a cada celda cuesta
+    Mapa.costo) de cada celda a la que se puede llegar.
+
+    Devuelve:
+        dict<Coord, int>: Los costos (el origen está, aunque esté bloqueado)
+    """
+    origen = mapa.origen()
+    costo = {origen: 0}
+    pendientes = [(0, origen)]
+    while pendientes:
+        c, coord = heappop(pendientes)
+        if c > costo[coord]:
+            continue
+        for vecina in vecinas(mapa, coord):
+            nuevo = c + mapa.costo(vecina)
+            if nuevo < costo.get(vecina, nuevo + 1):
+                costo[vecina] = nuevo
+                heappush(pendientes, (nuevo, vecina))
+    return costo
+
+def mapas_de_prueba(azar):
+    """Mapas chicos: laberintos y mapas abiertos con celdas bloqueadas al
+    azar, con el destino en cualquier lugar."""
+    for k in range(8):
+        filas, columnas = azar.randint(5, 25), azar.randint(5, 25)
+        if k % 2:
+            mapa = generar_laberinto(filas, columnas, azar.randrange(1000))
+        else:
+            mapa = Mapa(filas, columnas)
+            for _ in range(filas * columnas // 3):
+                mapa.bloquear(mapa.coord(azar.randrange(filas), azar.randrange(columnas)))
+        mapa.asignar_destino(celda_al_azar(azar, mapa))
+        yield mapa
+
+def celda_al_azar(azar, mapa):
+    filas, columnas = mapa.dimension()
+    return mapa.coord(azar.randrange(filas - 1), azar.randrange(columnas - 1))
+
+def editar(azar, mapa):
+    """Hace una edición al azar, como las del editor.
+
+    Devuelve:
+        list<Coord>: Las celdas que se bloquearon, desbloquearon o a las que
+                     se les cambió el costo (vacía si se movió el origen o
+                     el destino)
+    """
+    filas, columnas = mapa.dimension()
+    r = azar.random()
+    if r < 0.05:
+        mapa.asignar_origen(celda_al_azar(azar, mapa))
+        return []
+    if r < 0.1:
+        mapa.asignar_destino(celda_al_azar(azar, mapa))
+        return []
+    if r < 0.3:
+        coords = [celda_al_azar(azar, mapa) for _ in range(azar.choice([1, 1, 4]))]
+        for coord in coords:
+            mapa.asignar_costo(coord, azar.choice([1, 2, 9, COSTO_MAXIMO]))
+        return coords
+    # Una celda (un clic) o varias (un arrastre), incluso fuera de los
+    # límites de es_coord_valida
+    coords = [mapa.coord(azar.randrange(filas), azar.randrange(columnas))
+              for _ in range(azar.choice([1, 1, 4]))]
+    for coord in coords:
+        mapa.alternar_bloque(coord)
+    return coords
+
+class PruebaPlanificadorIncremental(unittest.TestCase):
+    def test_ediciones_al_azar(self):
+        azar = random.Random(1)
+        for mapa in mapas_de_prueba(azar):
+            planificador = PlanificadorIncremental(mapa)
+            for _ in range(EDICIONES):
+                planificador.celdas_modificadas(editar(azar, mapa))
+                planificador.calcular()
+                self.verificar_camino(mapa, list(planificador.camino()))
+
+    def test_empieza_de_cero(self):
+        azar = random.Random(2)
+        for mapa in mapas_de_prueba(azar):
+            planificador = PlanificadorIncremental(mapa)
+            planificador.calcular()
+            # Ediciones sin avisar: reiniciar() tiene que descartar todo
+            for _ in range(20):
+                editar(azar, mapa)
+            planificador.reiniciar()
+            planificador.calcular()
+            self.verificar_camino(mapa, list(planificador.camino()))
+
+    def verificar_camino(self, mapa, camino):
+        costo = costos_minimos(mapa).get(mapa.destino())
+        if costo is None:
+            self.assertEqual(camino, [])
+            return
+        self.assertEqual(sum(mapa.costo(coord) for coord in camino[1:]), costo)
+        self.assertEqual(camino[0], mapa.origen())
+        self.assertEqual(camino[-1], mapa.destino())
+        for anterior, siguiente in zip(camino, camino[1:]):
+            self.assertIn(siguiente, vecinas(mapa, anterior))
+
+class PruebaConectividad(unittest.TestCase):
+    def test_ediciones_al_azar(self):
+        azar = random.Random(3)
+        for mapa in mapas_de_prueba(azar):
+            conectividad = Conectividad(mapa)
+            for _ in range(EDICIONES):
+                # Como el editor: al mover el origen o el destino se avisa
+                # sin celdas
+                conectividad.celdas_modificadas(editar(azar, mapa))
+                self.verificar_componentes(mapa, conectividad)
+
+    def test_empieza_de_cero(self):
+        azar = random.Random(4)
+        for mapa in mapas_de_prueba(azar):
+            conectividad = Conectividad(mapa)
+            for _ in range(20):
+                editar(azar, mapa)
+            conectividad.reiniciar()
+            self.verificar_componentes(mapa, conectividad)
+
+    def verificar_componentes(self, mapa, conectividad):
+        alcanzables = distancias(mapa)
+        self.assertEqual(conectividad.alcanzable(), mapa.destino() in alcanzables)
+        componentes = conectividad.componente_origen()
+        for coord in mapa:
+            if not mapa.es_coord_valida(coord) or mapa.celda_bloqueada(coord):
+                self.assertIsNone(conectividad.componente(coord))
+            else:
+                self.assertEqual(conectividad.componente(coord) in componentes, coord in alcanzables, coord)
+
+if __name__ == '__main__':
+    unittest.main()
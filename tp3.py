@@ -1,10 +1,40 @@
 import tkinter as tk
-from mapa import Coord, Mapa
-from laberinto import generar_laberinto
-from ia import IA
-import sys
+from tkinter import filedialog, messagebox
+import contextlib
+import math
+import threading
+import time
+from mapa import Coord, Mapa, COSTO_MAXIMO
+from laberinto import generar_laberinto_por_pasos, MapaMosaico
+from archivo import guardar_mapa, cargar_mapa
+from ia import SOLUCIONADORES, PlanificadorIncremental, Conectividad, avanzar_pasos
+from soluciones import CacheSoluciones
+from tareas import Tarea
+from historial import Historial
+from carrera import Carrera, agentes_por_defecto
 
 DISTANCIA_NIEBLA = 2
+# Traslaciones (df, dc) de las celdas que están a DISTANCIA_NIEBLA o menos de
+# una celda: las únicas que pueden verse sin niebla alrededor del jugador.
+ESTENCIL_NIEBLA = [(df, dc)
+                   for df in range(-DISTANCIA_NIEBLA, DISTANCIA_NIEBLA + 1)
+                   for dc in range(-DISTANCIA_NIEBLA, DISTANCIA_NIEBLA + 1)
+                   if df * df + dc * dc <= DISTANCIA_NIEBLA * DISTANCIA_NIEBLA]
+# Tiempo máximo (en segundos) de trabajo por cuadro en las animaciones.
+DURACION_CUADRO = 0.02
+# Espera entre lotes de pasos de la IA en ModoIA.
+ESPERA_PASOS_MS = 50
+# Pasos por lote al resolver hasta el final en ModoIA: entre lote y lote se
+# puede dibujar y cerrar la ventana.
+PASOS_POR_LOTE_RESOLVER = 1 << 16
+TIPOS_ARCHIVO = [("Mapas", "*.lab"), ("Todos los archivos", "*")]
+# Bloques por lado del laberinto de "Mundo infinito" (ver MapaMosaico): un
+# millón de celdas por lado.
+BLOQUES_MUNDO = 1 << 15
+
+def _marron(t):
+    # Mezcla de blanco (t = 0) y marrón (t = 1)
+    return '#%02x%02x%02x' % (255 - round(96 * t), 255 - round(160 * t), 255 - round(224 * t))
 
 class Color:
     VACIO = 'white'
@@ -15,6 +45,17 @@ class Color:
     VISITADO = 'cyan'
     CAMINO = 'blue'
     JUGADOR = 'yellow'
+    ALCANZABLE = '#ffffe0'
+    # Celdas libres según su costo (ver Mapa.costo): de blanco (costo 1) a
+    # marrón (COSTO_MAXIMO), en escala logarítmica para que se distingan
+    # los costos chicos.
+    COSTOS = [VACIO] * 2 + [_marron(math.log(costo) / math.log(COSTO_MAXIMO))
+                            for costo in range(2, COSTO_MAXIMO + 1)]
+    # Colores de los agentes de una carrera (se repiten si hay más agentes).
+    # Sin espacios en los nombres: en modo imagen los colores se pasan a
+    # PhotoImage.put separados por espacios.
+    AGENTES = ['yellow', 'magenta', 'orange', 'blue', 'purple', 'brown',
+               '#ff1493', '#ff8c00', 'gold', 'orchid', 'sienna', 'navy']
 
     @staticmethod
     def basico(mapa, coord):
@@ -26,6 +67,13 @@ class Color:
             return Color.BLOQUE
         return Color.VACIO
 
+    @staticmethod
+    def con_costo(mapa, coord):
+        color = Color.basico(mapa, coord)
+        if color == Color.VACIO and mapa.costos is not None:
+            return Color.COSTOS[mapa.costo(coord)]
+        return color
+
     @staticmethod
     def con_niebla(mapa, coord, coord_jugador):
         if coord == coord_jugador:
@@ -42,32 +90,431 @@ class Color:
             return Color.CAMINO
         if coord in visitados:
             return Color.VISITADO
-        return Color.basico(mapa, coord)
+        return Color.con_costo(mapa, coord)
+
+    @staticmethod
+    def carrera(mapa, coord, ocupadas):
+        color = ocupadas.get(coord)
+        if color is not None:
+            return color
+        return Color.con_costo(mapa, coord)
+
+class Pertenencia:
+    """Adapta una función ``celda -> bool`` para poder usarla con ``in``."""
+    def __init__(self, funcion):
+        self.funcion = funcion
+
+    def __contains__(self, coord):
+        return self.funcion(coord)
+
+def _franjas(ventana, interior):
+    """Rectángulos que cubren las celdas de ``ventana`` que no están en
+    ``interior`` (un rectángulo dentro de ``ventana``, o None).
+
+    Devuelve:
+        list<(int, int, int, int)>: Fila desde, fila hasta, columna desde y
+                                    columna hasta de cada rectángulo
+    """
+    if interior is None:
+        return [ventana]
+    f0, f1, c0, c1 = ventana
+    if0, if1, ic0, ic1 = interior
+    franjas = [(f0, if0, c0, c1), (if1, f1, c0, c1), (if0, if1, c0, ic0), (if0, if1, ic1, c1)]
+    return [franja for franja in franjas if franja[0] < franja[1] and franja[2] < franja[3]]
 
 class Vista(tk.Canvas):
     TAM_CELDA_PX = 20
-
-    def __init__(self, contenedor, mapa):
+    # Límites del tamaño de celda al hacer zoom.
+    MIN_TAM_CELDA_PX = 1
+    MAX_TAM_CELDA_PX = 40
+    # Tamaño máximo (en px) del área visible del mapa. Si el mapa es más
+    # grande, se muestra una parte y se puede desplazar.
+    MAX_LADO_VENTANA_PX = 1000
+    # Celdas de más que se dibujan alrededor del área visible, para que los
+    # desplazamientos cortos no obliguen a redibujar.
+    MARGEN_CELDAS = 8
+    # Por encima de esta cantidad de celdas dibujadas, se usa una sola imagen
+    # en lugar de un rectángulo por celda.
+    MAX_CELDAS_RECTANGULOS = 40000
+    # Si cambian más celdas que estas en una misma fila, se redibuja la fila
+    # entera de la imagen de una vez.
+    MAX_CELDAS_SUELTAS = 16
+
+    def __init__(self, contenedor, mapa, raster=None, tam_celda=None, cerrojo=None):
+        """Constructor.
+
+        Sólo se dibujan las celdas que están dentro del área visible (más un
+        margen). El área visible se puede desplazar con las barras o con la
+        rueda del mouse (Shift para desplazar horizontalmente), y se puede
+        hacer zoom con Control + rueda.
+
+        Argumentos:
+            contenedor: Widget contenedor
+            mapa (Mapa): El mapa a dibujar
+            raster (bool|None): Si es True, las celdas se dibujan en una única
+                tk.PhotoImage; si es False, con un rectángulo por celda. Si es
+                None se elige según la cantidad de celdas a dibujar.
+            tam_celda (int|None): Tamaño inicial de las celdas en px. Si es
+                None, el mayor (hasta TAM_CELDA_PX) con el que entra el
+                mapa entero.
+            cerrojo (threading.Lock|None): Si los colores de las celdas
+                dependen de algo que cambia en otro hilo, el cerrojo que hay
+                que tomar para redibujar al desplazar o hacer zoom
+        """
+        self._iniciar(mapa, raster, tam_celda, cerrojo)
+        super().__init__(contenedor, width=self.ancho, height=self.alto)
+
+        self.barra_x = tk.Scrollbar(contenedor, orient="horizontal", command=self.desplazar_x)
+        self.barra_y = tk.Scrollbar(contenedor, orient="vertical", command=self.desplazar_y)
+        self.configure(xscrollcommand=self.barra_x.set, yscrollcommand=self.barra_y.set)
+        self.configurar_region()
+
+        self.bind("<MouseWheel>", lambda e: self.rueda(-e.delta, e.state))
+        self.bind("<Button-4>", lambda e: self.rueda(-1, e.state))
+        self.bind("<Button-5>", lambda e: self.rueda(1, e.state))
+        self.bind("<Configure>", lambda e: self.configurada())
+
+    def _iniciar(self, mapa, raster=None, tam_celda=None, cerrojo=None):
+        """Inicializa todo lo que no es del canvas de Tk (ver __init__), así
+        una vista sin Tk (ver benchmark.VistaSinTk) queda igual que una
+        real."""
         filas, columnas = mapa.dimension()
-        super().__init__(contenedor, width=columnas * Vista.TAM_CELDA_PX, height=filas * Vista.TAM_CELDA_PX)
+        if tam_celda is None:
+            tam_celda = max(Vista.MIN_TAM_CELDA_PX, min(Vista.TAM_CELDA_PX, Vista.MAX_LADO_VENTANA_PX // max(filas, columnas)))
+        ancho = min(columnas * tam_celda, Vista.MAX_LADO_VENTANA_PX)
+        alto = min(filas * tam_celda, Vista.MAX_LADO_VENTANA_PX)
         self.mapa = mapa
+        # Se piden una y otra vez las Coords de las mismas celdas visibles
+        mapa.compartir_coords()
+        self.ancho = ancho
+        self.alto = alto
+        self.tam_celda = tam_celda
+        self.forzar_raster = raster
+        self.raster = False
+        self.obtener_color_celda = Color.basico
+        self.cerrojo = cerrojo if cerrojo is not None else contextlib.nullcontext()
+        # Rango de celdas dibujadas (la "ventana"): (fila_desde, fila_hasta,
+        # columna_desde, columna_hasta), sin incluir los extremos "hasta".
+        self.ventana = None
+        # Último color asignado a cada celda de la ventana, fila por fila.
+        self.colores = []
+        # Modo rectángulos: rectángulo de cada celda de la ventana (en el
+        # mismo orden que colores), y rectángulos ocultos para reutilizar.
+        self.items = []
+        self.items_libres = []
+        # Modo imagen: la imagen con las celdas de la ventana, la otra imagen
+        # (para correr la ventana, ver crear_imagen) y su item del canvas.
+        self.imagen = None
+        self.imagen_libre = None
+        self.item_imagen = None
+
+    def grid(self, row=0, column=0, **opciones):
+        """Ubica la vista en la grilla del contenedor, con las barras de
+        desplazamiento a la derecha y abajo."""
+        super().grid(row=row, column=column, **opciones)
+        self.barra_y.grid(row=row, column=column + 1, sticky="ns")
+        self.barra_x.grid(row=row + 1, column=column, sticky="we")
+
+    def grid_forget(self):
+        super().grid_forget()
+        self.barra_x.grid_forget()
+        self.barra_y.grid_forget()
+
+    def destroy(self):
+        super().destroy()
+        self.barra_x.destroy()
+        self.barra_y.destroy()
+
+    def configurar_region(self):
+        filas, columnas = self.mapa.dimension()
+        self.configure(scrollregion=(0, 0, columnas * self.tam_celda, filas * self.tam_celda))
+
+    def configurada(self):
+        with self.cerrojo:
+            self.actualizar_ventana()
+
+    def desplazar_x(self, *args):
+        with self.cerrojo:
+            self.xview(*args)
+            self.actualizar_ventana()
+
+    def desplazar_y(self, *args):
+        with self.cerrojo:
+            self.yview(*args)
+            self.actualizar_ventana()
+
+    def rueda(self, sentido, estado):
+        paso = 1 if sentido > 0 else -1
+        if estado & 0x4:
+            self.zoom(0.5 if paso > 0 else 2)
+        elif estado & 0x1:
+            self.desplazar_x("scroll", paso, "units")
+        else:
+            self.desplazar_y("scroll", paso, "units")
 
-    def actualizar(self, obtener_color_celda):
+    def zoom(self, factor):
+        """Cambia el tamaño de las celdas, manteniendo centrada la celda que
+        estaba en el centro del área visible."""
+        tam_celda = int(max(Vista.MIN_TAM_CELDA_PX, min(Vista.MAX_TAM_CELDA_PX, self.tam_celda * factor)))
+        if tam_celda == self.tam_celda:
+            return
+        centro = self.coord_px_a_celda(self.ancho / 2, self.alto / 2)
+        with self.cerrojo:
+            self.tam_celda = tam_celda
+            self.borrar_celdas()
+            self.configurar_region()
+            self.centrar(centro)
+
+    def centrar(self, coord):
+        """Desplaza el área visible para que la celda quede en el centro."""
+        filas, columnas = self.mapa.dimension()
+        tam = self.tam_celda
+        self.xview_moveto((coord.columna * tam + (tam - self.ancho) / 2) / (columnas * tam))
+        self.yview_moveto((coord.fila * tam + (tam - self.alto) / 2) / (filas * tam))
+        self.actualizar_ventana()
+
+    def rango_visible(self):
+        """Rango de celdas que entran en el área visible.
+
+        Devuelve:
+            (int, int, int, int): fila desde, fila hasta, columna desde,
+                                  columna hasta (sin incluir los "hasta")
+        """
+        filas, columnas = self.mapa.dimension()
+        tam = self.tam_celda
+        x = self.canvasx(0)
+        y = self.canvasy(0)
+        return (max(0, int(y // tam)), min(filas, int((y + self.alto) // tam) + 1),
+                max(0, int(x // tam)), min(columnas, int((x + self.ancho) // tam) + 1))
+
+    def actualizar_ventana(self):
+        """Ajusta las celdas dibujadas al área visible.
+
+        Si el área visible sigue dentro de las celdas dibujadas no hace nada.
+        Si no, se dibujan las celdas del área visible más un margen,
+        reutilizando los rectángulos de las celdas que dejaron de verse.
+        """
+        f0, f1, c0, c1 = self.rango_visible()
+        if self.ventana is not None:
+            vf0, vf1, vc0, vc1 = self.ventana
+            if vf0 <= f0 and f1 <= vf1 and vc0 <= c0 and c1 <= vc1:
+                return
+        filas, columnas = self.mapa.dimension()
+        m = Vista.MARGEN_CELDAS
+        ventana = (max(0, f0 - m), min(filas, f1 + m), max(0, c0 - m), min(columnas, c1 + m))
+        f0, f1, c0, c1 = ventana
+        raster = self.forzar_raster
+        if raster is None:
+            raster = (f1 - f0) * (c1 - c0) > Vista.MAX_CELDAS_RECTANGULOS
+        if raster != self.raster:
+            self.borrar_celdas()
+            self.raster = raster
+
+        ancho = c1 - c0
+        colores = [None] * ((f1 - f0) * ancho)
+        items = [None] * len(colores) if not raster else []
+        anterior = self.ventana
+        # Celdas de la ventana anterior que siguen dentro de la nueva: se
+        # copian de a filas enteras, sin volver a calcular sus colores.
+        conservadas = None
+        if anterior is not None:
+            vf0, vf1, vc0, vc1 = anterior
+            ancho_anterior = vc1 - vc0
+            cf0, cf1, cc0, cc1 = max(f0, vf0), min(f1, vf1), max(c0, vc0), min(c1, vc1)
+            if cf0 < cf1 and cc0 < cc1:
+                conservadas = (cf0, cf1, cc0, cc1)
+                n = cc1 - cc0
+                for f in range(cf0, cf1):
+                    i = (f - f0) * ancho + cc0 - c0
+                    j = (f - vf0) * ancho_anterior + cc0 - vc0
+                    colores[i:i + n] = self.colores[j:j + n]
+                    if not raster:
+                        items[i:i + n] = self.items[j:j + n]
+            if not raster:
+                # Los rectángulos de las demás se ocultan para reutilizarlos
+                for ff0, ff1, fc0, fc1 in _franjas(anterior, conservadas):
+                    for f in range(ff0, ff1):
+                        j = (f - vf0) * ancho_anterior - vc0
+                        for item in self.items[j + fc0:j + fc1]:
+                            self.itemconfigure(item, state="hidden")
+                            self.items_libres.append(item)
+        self.ventana = ventana
+        self.colores = colores
+        self.items = items
+
+        tam = self.tam_celda
+        mapa = self.mapa
+        for ff0, ff1, fc0, fc1 in _franjas(ventana, conservadas):
+            for f in range(ff0, ff1):
+                for c in range(fc0, fc1):
+                    i = (f - f0) * ancho + c - c0
+                    color = colores[i] = self.obtener_color_celda(mapa, mapa.coord(f, c))
+                    if raster:
+                        continue
+                    x = c * tam
+                    y = f * tam
+                    if self.items_libres:
+                        item = self.items_libres.pop()
+                        self.coords(item, x, y, x + tam, y + tam)
+                        self.itemconfigure(item, fill=color, state="normal")
+                    else:
+                        item = self.create_rectangle((x, y, x + tam, y + tam), fill=color, outline="")
+                    items[i] = item
+        if raster:
+            self.crear_imagen(anterior, conservadas)
+
+    def borrar_celdas(self):
+        """Borra todo lo dibujado, para volver a dibujar desde cero."""
         self.delete("all")
-        for coord in self.mapa:
-            color = obtener_color_celda(self.mapa, coord)
+        self.ventana = None
+        self.colores = []
+        self.items = []
+        self.items_libres = []
+        self.imagen = None
+        self.imagen_libre = None
+        self.item_imagen = None
+
+    def actualizar(self, obtener_color_celda, coords=None):
+        """Actualiza los colores de las celdas.
+
+        Sólo se redibujan las celdas dibujadas (ver actualizar_ventana) cuyo
+        color cambió desde la última actualización.
+
+        Argumentos:
+            obtener_color_celda: función (mapa, coord) -> color
+            coords (iterable<Coord>|None): Si se indica, sólo se recalcula el
+                color de esas celdas; si no, el de todas las celdas dibujadas.
+        """
+        self.obtener_color_celda = obtener_color_celda
+        if self.ventana is None:
+            self.actualizar_ventana()
+            return
+        f0, f1, c0, c1 = self.ventana
+        ancho = c1 - c0
+        if coords is None:
+            coords = (self.mapa.coord(f, c) for f in range(f0, f1) for c in range(c0, c1))
+        colores = self.colores
+        cambios = []
+        for coord in coords:
             f, c = coord
-            x = c * Vista.TAM_CELDA_PX
-            y = f * Vista.TAM_CELDA_PX
-            self.create_rectangle((x, y, x + Vista.TAM_CELDA_PX, y + Vista.TAM_CELDA_PX), fill=color, outline="")
+            if not (f0 <= f < f1 and c0 <= c < c1):
+                continue
+            i = (f - f0) * ancho + c - c0
+            color = obtener_color_celda(self.mapa, coord)
+            if colores[i] != color:
+                colores[i] = color
+                cambios.append(i)
+        if self.raster:
+            self.pintar_imagen(cambios)
+        else:
+            for i in cambios:
+                self.itemconfigure(self.items[i], fill=colores[i])
+
+    def crear_imagen(self, anterior=None, conservadas=None):
+        """Crea la imagen con todas las celdas de la ventana.
+
+        Se dibuja en una imagen distinta de la que se está mostrando, y las
+        celdas ``conservadas`` (ver actualizar_ventana) se copian de la
+        imagen de la ventana ``anterior`` de una vez: sólo se pintan las
+        franjas nuevas.
+        """
+        f0, f1, c0, c1 = self.ventana
+        tam = self.tam_celda
+        ancho = (c1 - c0) * tam
+        alto = (f1 - f0) * tam
+        imagen = self.imagen_libre
+        if imagen is None or imagen.width() != ancho or imagen.height() != alto:
+            imagen = self.nueva_imagen(ancho, alto)
+        if conservadas is not None:
+            vf0, _, vc0, _ = anterior
+            cf0, cf1, cc0, cc1 = conservadas
+            self.copiar_imagen(imagen, self.imagen,
+                               ((cc0 - vc0) * tam, (cf0 - vf0) * tam, (cc1 - vc0) * tam, (cf1 - vf0) * tam),
+                               ((cc0 - c0) * tam, (cf0 - f0) * tam))
+        self.imagen_libre = self.imagen
+        self.imagen = imagen
+        if self.item_imagen is None:
+            self.item_imagen = self.create_image(c0 * tam, f0 * tam, image=imagen, anchor="nw")
+        else:
+            self.itemconfigure(self.item_imagen, image=imagen)
+            self.coords(self.item_imagen, c0 * tam, f0 * tam)
+        if conservadas is None:
+            for f in range(f1 - f0):
+                self.pintar_fila(f)
+            return
+        for ff0, ff1, fc0, fc1 in _franjas(self.ventana, conservadas):
+            self.pintar_bloque(ff0 - f0, ff1 - f0, fc0 - c0, fc1 - c0)
+
+    def nueva_imagen(self, ancho, alto):
+        return tk.PhotoImage(master=self, width=ancho, height=alto)
+
+    def copiar_imagen(self, destino, fuente, desde, hasta):
+        """Copia la región ``desde`` (x0, y0, x1, y1) de la imagen ``fuente``
+        a la imagen ``destino``, con la esquina de arriba a la izquierda en
+        ``hasta`` (x, y)."""
+        self.tk.call(destino, 'copy', fuente, '-from', *desde, '-to', *hasta)
+
+    def pintar_imagen(self, cambios):
+        """Redibuja en la imagen las celdas de la ventana con los índices
+        dados."""
+        f0, f1, c0, c1 = self.ventana
+        ancho = c1 - c0
+        tam = self.tam_celda
+        por_fila = {}
+        for i in cambios:
+            por_fila.setdefault(i // ancho, []).append(i)
+        for f, indices in por_fila.items():
+            if len(indices) > Vista.MAX_CELDAS_SUELTAS:
+                self.pintar_fila(f)
+                continue
+            for i in indices:
+                x = (i - f * ancho) * tam
+                y = f * tam
+                self.imagen.put(self.colores[i], to=(x, y, x + tam, y + tam))
+
+    def pintar_fila(self, f):
+        """Redibuja en la imagen la fila ``f`` de la ventana (contando desde
+        la primera fila de la ventana)."""
+        f0, f1, c0, c1 = self.ventana
+        ancho = c1 - c0
+        tam = self.tam_celda
+        fila = self.colores[f * ancho:(f + 1) * ancho]
+        pixeles = " ".join(" ".join((color,) * tam) for color in fila)
+        self.imagen.put("{" + pixeles + "}", to=(0, f * tam, ancho * tam, (f + 1) * tam))
+
+    def pintar_bloque(self, fila_desde, fila_hasta, columna_desde, columna_hasta):
+        """Redibuja en la imagen un rectángulo de celdas de la ventana
+        (contando desde la primera fila y columna de la ventana, sin incluir
+        los "hasta"), con una sola llamada a la imagen."""
+        f0, f1, c0, c1 = self.ventana
+        ancho = c1 - c0
+        tam = self.tam_celda
+        lineas = []
+        for f in range(fila_desde, fila_hasta):
+            fila = self.colores[f * ancho + columna_desde:f * ancho + columna_hasta]
+            linea = "{" + " ".join(" ".join((color,) * tam) for color in fila) + "}"
+            lineas.extend((linea,) * tam)
+        self.imagen.put(" ".join(lineas), to=(columna_desde * tam, fila_desde * tam))
 
     def coord_px_a_celda(self, x, y):
-        return Coord(int(y // Vista.TAM_CELDA_PX), int(x // Vista.TAM_CELDA_PX))
+        return Coord(int(self.canvasy(y) // self.tam_celda), int(self.canvasx(x) // self.tam_celda))
 
 class Editor(tk.Tk):
     def __init__(self):
         super().__init__()
         self.modo = None
+        self.generacion = None
+        self.soluciones = CacheSoluciones()
+        # Camino de menor costo que se muestra mientras se edita (ver
+        # mostrar_camino)
+        self.planificador = None
+        self.camino = set()
+        # Celdas alcanzables desde el origen (ver mostrar_alcanzables)
+        self.conectividad = None
+        # Ediciones para deshacer y rehacer, y celdas editadas que todavía
+        # no se dibujaron (ver editar)
+        self.historial = Historial()
+        self.editadas = []
 
         self.title("TP3 - Editor")
         self.resizable(False, False)
@@ -89,20 +536,69 @@ class Editor(tk.Tk):
         dimension.grid(row=0, sticky="nwes")
 
         tk.Label(dimension, text="Filas").grid(row=0, column=0, padx=(0, 5), sticky="e")
-        tk.Spinbox(dimension, textvariable=self.filas, from_=5, to=1000, width=5).grid(row=0, column=1, sticky="w")
+        tk.Spinbox(dimension, textvariable=self.filas, from_=5, to=5000, width=5).grid(row=0, column=1, sticky="w")
 
         tk.Label(dimension, text="Columnas").grid(row=1, column=0, padx=(0, 5), sticky="e")
-        tk.Spinbox(dimension, textvariable=self.columnas, from_=5, to=1000, width=5).grid(row=1, column=1, sticky="w")
+        tk.Spinbox(dimension, textvariable=self.columnas, from_=5, to=5000, width=5).grid(row=1, column=1, sticky="w")
 
         self.filas.trace('w', self.cambiar_dimension)
         self.columnas.trace('w', self.cambiar_dimension)
 
-        tk.Button(panel, text="Generar", command=self.generar).grid(row=1, sticky="we", pady=5)
+        self.bind("<Control-z>", lambda e: self.deshacer())
+        self.bind("<Control-y>", lambda e: self.rehacer())
+        self.bind("<Control-Z>", lambda e: self.rehacer())
 
-        panel.rowconfigure(2, weight=1)
+        tk.Button(panel, text="Generar", command=self.generar).grid(row=1, sticky="we", pady=5)
 
-        tk.Button(panel, text="Jugar", command=self.jugar).grid(row=3, sticky="we")
-        tk.Button(panel, text="IA", command=self.ia).grid(row=4, sticky="we", pady=(5, 0))
+        archivo = tk.Frame(panel)
+        archivo.grid(row=2, sticky="we")
+        archivo.columnconfigure((0, 1), weight=1)
+        # Botones que no se pueden usar mientras se genera un laberinto (ver
+        # actualizar_botones)
+        self.botones_mapa = []
+        self.botones_mapa.append(tk.Button(archivo, text="Guardar", command=self.guardar))
+        self.botones_mapa[-1].grid(row=0, column=0, sticky="we")
+        tk.Button(archivo, text="Cargar", command=self.cargar).grid(row=0, column=1, sticky="we")
+        self.botones_mapa.append(tk.Button(archivo, text="Deshacer", command=self.deshacer))
+        self.botones_mapa[-1].grid(row=1, column=0, sticky="we")
+        self.botones_mapa.append(tk.Button(archivo, text="Rehacer", command=self.rehacer))
+        self.botones_mapa[-1].grid(row=1, column=1, sticky="we")
+
+        # Con "Costo" marcado, el botón izquierdo pinta el costo elegido en
+        # lugar de bloquear y desbloquear celdas
+        self.pintar_costos = tk.BooleanVar()
+        self.pintar_costos.set(False)
+        self.costo = tk.IntVar()
+        self.costo.set(5)
+        tk.Checkbutton(archivo, text="Costo", variable=self.pintar_costos).grid(row=2, column=0, sticky="w")
+        tk.Spinbox(archivo, textvariable=self.costo, from_=1, to=COSTO_MAXIMO, width=5).grid(row=2, column=1, sticky="we")
+
+        panel.rowconfigure(3, weight=1)
+
+        self.botones_mapa.append(tk.Button(panel, text="Jugar", command=self.jugar))
+        self.botones_mapa[-1].grid(row=4, sticky="we")
+        self.botones_mapa.append(tk.Button(panel, text="IA", command=self.ia))
+        self.botones_mapa[-1].grid(row=5, sticky="we", pady=(5, 0))
+
+        self.solucionador = tk.StringVar()
+        self.solucionador.set("Backtracking")
+        tk.OptionMenu(panel, self.solucionador, *SOLUCIONADORES).grid(row=6, sticky="we")
+
+        self.mostrar_camino = tk.BooleanVar()
+        self.mostrar_camino.set(False)
+        tk.Checkbutton(panel, text="Mostrar camino", variable=self.mostrar_camino,
+                       command=self.cambiar_mostrar_camino).grid(row=7, sticky="w")
+
+        self.mostrar_alcanzables = tk.BooleanVar()
+        self.mostrar_alcanzables.set(False)
+        tk.Checkbutton(panel, text="Mostrar alcanzables", variable=self.mostrar_alcanzables,
+                       command=self.cambiar_mostrar_alcanzables).grid(row=8, sticky="w")
+        self.indicador = tk.Label(panel, text="")
+        self.indicador.grid(row=9, sticky="w")
+
+        tk.Button(panel, text="Mundo infinito", command=self.jugar_mundo).grid(row=10, sticky="we", pady=(5, 0))
+        self.botones_mapa.append(tk.Button(panel, text="Carrera", command=self.carrera))
+        self.botones_mapa[-1].grid(row=11, sticky="we", pady=(5, 0))
 
         self.vista = self.crear_vista()
 
@@ -125,48 +621,293 @@ class Editor(tk.Tk):
         vista.bind("<2>", lambda e: self.asignar_origen(self.vista.coord_px_a_celda(e.x, e.y)))
         vista.bind("<3>", lambda e: self.asignar_destino(self.vista.coord_px_a_celda(e.x, e.y)))
         vista.bind("<B1-Motion>", lambda e: self.arrastrar(self.vista.coord_px_a_celda(e.x, e.y)))
+        vista.bind("<ButtonRelease-1>", lambda e: self.terminar_edicion())
 
         return vista
 
-    def actualizar_vista(self):
-        self.vista.actualizar(Color.basico)
+    def actualizar_vista(self, coords=None):
+        camino = self.camino
+        conectividad = self.conectividad
+        alcanzables = conectividad.componente_origen() if conectividad is not None else ()
+
+        def obtener_color_celda(mapa, coord):
+            if coord in camino and coord != mapa.origen() and coord != mapa.destino():
+                return Color.CAMINO
+            color = Color.con_costo(mapa, coord)
+            if color == Color.VACIO and alcanzables and conectividad.componente(coord) in alcanzables:
+                return Color.ALCANZABLE
+            return color
+
+        self.vista.actualizar(obtener_color_celda, coords)
+        self.actualizar_indicador()
+
+    def actualizar_indicador(self):
+        if self.conectividad is None:
+            self.indicador.configure(text="")
+        elif self.conectividad.alcanzable():
+            self.indicador.configure(text="Destino alcanzable", fg=Color.DESTINO)
+        else:
+            self.indicador.configure(text="Destino inalcanzable", fg=Color.ORIGEN)
+
+    def cambiar_mostrar_camino(self):
+        self.reiniciar_camino()
+        self.actualizar_vista()
+
+    def cambiar_mostrar_alcanzables(self):
+        self.reiniciar_conectividad()
+        self.actualizar_vista()
+
+    def reiniciar_camino(self):
+        """Vuelve a calcular el camino desde cero (o lo descarta, si no se
+        muestra). No redibuja."""
+        if self.mostrar_camino.get() and self.generacion is None:
+            self.planificador = PlanificadorIncremental(self.mapa)
+            self.planificador.calcular()
+            self.camino = set(self.planificador.camino())
+        else:
+            self.planificador = None
+            self.camino = set()
+
+    def reiniciar_conectividad(self):
+        """Vuelve a calcular las celdas alcanzables desde cero (o las
+        descarta, si no se muestran). No redibuja."""
+        if self.mostrar_alcanzables.get() and self.generacion is None:
+            self.conectividad = Conectividad(self.mapa)
+        else:
+            self.conectividad = None
+
+    def celdas_editadas(self, coords, bloqueos=True):
+        """Redibuja las celdas editadas y, si se muestra el camino, lo repara
+        y redibuja sólo las celdas que entraron o salieron de él. Si se
+        muestran las celdas alcanzables y cambió cuáles son (más allá de
+        las editadas), se redibuja toda la vista.
+
+        Argumentos:
+            coords (list<Coord>): Las celdas editadas
+            bloqueos (bool): Si se bloquearon o desbloquearon celdas (si no,
+                cambió el origen o el destino)
+        """
+        redibujar_todo = False
+        if self.conectividad is not None:
+            redibujar_todo = self.conectividad.celdas_modificadas(coords if bloqueos else [])
+        if self.planificador is not None:
+            if bloqueos:
+                self.planificador.celdas_modificadas(coords)
+            self.planificador.calcular()
+            camino = set(self.planificador.camino())
+            coords = coords + list(camino ^ self.camino)
+            self.camino = camino
+        self.actualizar_vista(None if redibujar_todo else coords)
 
     def alternar_bloque(self, coord):
+        if self.generacion is not None:
+            # El mapa todavía se está generando en otro hilo
+            return
+        # Empieza una edición nueva (un clic y el arrastre que le sigue)
+        self.terminar_edicion()
+        if self.mapa.indice(coord) is None:
+            # Clic fuera del mapa
+            return
+        if self.pintar_costos.get():
+            self.pintar_costo(coord)
+            return
         self.mapa.alternar_bloque(coord)
         self.modo_arrastre = self.mapa.celda_bloqueada(coord)
-        self.actualizar_vista()
+        self.historial.alternada(self.mapa.indice(coord))
+        self.editar(coord)
 
     def arrastrar(self, coord):
+        if self.generacion is not None:
+            return
+        if self.pintar_costos.get():
+            self.pintar_costo(coord)
+            return
+        if self.mapa.celda_bloqueada(coord) == self.modo_arrastre or self.mapa.indice(coord) is None:
+            return
         if self.modo_arrastre:
            self.mapa.bloquear(coord)
         else:
            self.mapa.desbloquear(coord)
-        self.actualizar_vista()
+        self.historial.alternada(self.mapa.indice(coord))
+        self.editar(coord)
+
+    def pintar_costo(self, coord):
+        try:
+            costo = min(COSTO_MAXIMO, max(1, self.costo.get()))
+        except tk.TclError:
+            return
+        anterior = self.mapa.costo(coord)
+        if self.mapa.indice(coord) is None or anterior == costo:
+            return
+        self.mapa.asignar_costo(coord, costo)
+        self.historial.costo_cambiado(self.mapa.indice(coord), anterior, costo)
+        self.editar(coord)
+
+    def editar(self, coord):
+        """Agrega una celda editada (ya registrada en el historial) a las
+        que se dibujan todas juntas una vez por cuadro (ver
+        dibujar_editadas)."""
+        if not self.editadas:
+            self.after(int(DURACION_CUADRO * 1000), self.dibujar_editadas)
+        self.editadas.append(coord)
+
+    def dibujar_editadas(self):
+        editadas = self.editadas
+        self.editadas = []
+        if editadas:
+            self.celdas_editadas(editadas)
+
+    def terminar_edicion(self):
+        """Dibuja lo que falte y guarda la edición en curso en el
+        historial."""
+        self.dibujar_editadas()
+        self.historial.confirmar()
 
     def asignar_origen(self, coord):
+        if self.generacion is not None:
+            return
+        self.terminar_edicion()
+        anterior = self.mapa.origen()
         self.mapa.asignar_origen(coord)
-        self.actualizar_vista()
+        self.historial.origen_cambiado(anterior, coord)
+        self.historial.confirmar()
+        self.celdas_editadas([anterior, coord], bloqueos=False)
 
     def asignar_destino(self, coord):
+        if self.generacion is not None:
+            return
+        self.terminar_edicion()
+        anterior = self.mapa.destino()
         self.mapa.asignar_destino(coord)
-        self.actualizar_vista()
+        self.historial.destino_cambiado(anterior, coord)
+        self.historial.confirmar()
+        self.celdas_editadas([anterior, coord], bloqueos=False)
 
-    def generar(self):
-        self.reemplazar_mapa(generar_laberinto(self.filas.get(), self.columnas.get()))
+    def deshacer(self):
+        if self.generacion is not None:
+            return
+        self.terminar_edicion()
+        self.edicion_aplicada(self.historial.deshacer(self.mapa))
 
-    def reemplazar_mapa(self, mapa):
+    def rehacer(self):
+        if self.generacion is not None:
+            return
+        self.terminar_edicion()
+        self.edicion_aplicada(self.historial.rehacer(self.mapa))
+
+    def edicion_aplicada(self, edicion):
+        """Redibuja sólo las celdas que cambiaron al deshacer o rehacer."""
+        if edicion is None:
+            return
+        coord_de_indice = self.mapa.coord_de_indice
+        indices = edicion.indices()
+        if indices:
+            self.celdas_editadas([coord_de_indice(i) for i in indices])
+        extremos = [coord for cambio in (edicion.origen, edicion.destino) if cambio for coord in cambio]
+        if extremos:
+            self.celdas_editadas(extremos, bloqueos=False)
+
+    def generar(self):
+        """Genera un laberinto nuevo en otro hilo (ver tareas.Tarea), y lo
+        va dibujando a medida que se genera."""
+        mapa, pasos = generar_laberinto_por_pasos(self.filas.get(), self.columnas.get())
+        self.reemplazar_mapa(mapa, Tarea(pasos))
+        self.actualizar_botones()
+        self.after(0, self.continuar_generacion, self.generacion)
+
+    def continuar_generacion(self, tarea):
+        """Dibuja las celdas que desbloqueó la generación desde la última
+        vez, y vuelve a programarse cada DURACION_CUADRO segundos."""
+        if tarea is not self.generacion:
+            # El mapa fue reemplazado mientras se generaba
+            return
+        coords = []
+        for celda, intermedia in tarea.recibir():
+            coords.append(self.mapa.coord_de_indice(celda))
+            if intermedia is not None:
+                coords.append(self.mapa.coord_de_indice(intermedia))
+        if tarea.terminada:
+            self.generacion = None
+            self.actualizar_botones()
+            if self.mostrar_camino.get() or self.mostrar_alcanzables.get():
+                self.reiniciar_camino()
+                self.reiniciar_conectividad()
+                coords = None
+        self.actualizar_vista(coords)
+        if self.generacion is not None:
+            self.after(int(DURACION_CUADRO * 1000), self.continuar_generacion, tarea)
+
+    def cancelar_generacion(self):
+        if self.generacion is not None:
+            self.generacion.cancelar()
+            self.generacion = None
+            self.actualizar_botones()
+
+    def actualizar_botones(self):
+        """Deshabilita los botones que usan el mapa mientras se genera, y
+        los vuelve a habilitar cuando termina."""
+        estado = "disabled" if self.generacion is not None else "normal"
+        for boton in self.botones_mapa:
+            boton.configure(state=estado)
+
+    def guardar(self):
+        ruta = filedialog.asksaveasfilename(parent=self, defaultextension=".lab", filetypes=TIPOS_ARCHIVO)
+        if ruta:
+            guardar_mapa(self.mapa, ruta)
+
+    def cargar(self):
+        ruta = filedialog.askopenfilename(parent=self, filetypes=TIPOS_ARCHIVO)
+        if not ruta:
+            return
+        try:
+            mapa = cargar_mapa(ruta)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("TP3 - Editor", f"No se pudo cargar el mapa: {e}", parent=self)
+            return
+        filas, columnas = mapa.dimension()
+        self.filas.set(filas)
+        self.columnas.set(columnas)
+        self.reemplazar_mapa(mapa)
+
+    def reemplazar_mapa(self, mapa, generacion=None):
+        """Reemplaza el mapa del editor.
+
+        Argumentos:
+            mapa (Mapa): El mapa nuevo
+            generacion (Tarea|None): La tarea que está generando ``mapa``, si
+                todavía no terminó (ver generar). En ese caso el camino y las
+                celdas alcanzables se calculan cuando termina.
+        """
+        self.cancelar_generacion()
+        self.generacion = generacion
+        self.historial = Historial()
+        self.editadas = []
         self.mapa = mapa
         self.vista.grid_forget()
         self.vista.destroy()
         self.vista = self.crear_vista()
+        self.reiniciar_camino()
+        self.reiniciar_conectividad()
         self.actualizar_vista()
 
+    def destroy(self):
+        self.cancelar_generacion()
+        super().destroy()
+
     def jugar(self):
         self.ir_a_modo(ModoJuego(self))
 
+    def jugar_mundo(self):
+        """Juega en un laberinto enorme que se genera a medida que se
+        recorre (ver laberinto.MapaMosaico)."""
+        self.ir_a_modo(ModoJuego(self, MapaMosaico(BLOQUES_MUNDO, BLOQUES_MUNDO)))
+
     def ia(self):
         self.ir_a_modo(ModoIA(self))
 
+    def carrera(self):
+        self.ir_a_modo(ModoCarrera(self))
+
     def ir_a_modo(self, modo):
         self.modo = modo
         self.modo.protocol("WM_DELETE_WINDOW", lambda: self.modo_terminado())
@@ -180,17 +921,26 @@ class Editor(tk.Tk):
         self.deiconify()
 
 class ModoJuego(tk.Toplevel):
-    def __init__(self, editor):
+    def __init__(self, editor, mapa=None):
+        """Constructor.
+
+        Argumentos:
+            editor (Editor): El editor
+            mapa (Mapa|None): El mapa en el que se juega (por defecto, el
+                del editor)
+        """
         super().__init__(editor)
 
         self.resizable(False, False)
 
         self.title("TP3 - Jugador")
 
-        self.vista = Vista(self, editor.mapa)
+        self.mapa = mapa if mapa is not None else editor.mapa
+        # Un mapa enorme no entra en la ventana: se empieza con celdas
+        # grandes y se sigue al jugador.
+        self.vista = Vista(self, self.mapa, tam_celda=Vista.TAM_CELDA_PX if mapa is not None else None)
         self.vista.grid()
 
-        self.mapa = editor.mapa
         self.coord_jugador = self.mapa.origen()
 
         self.bind('<Left>', lambda e: self.mover(0, -1))
@@ -200,17 +950,26 @@ class ModoJuego(tk.Toplevel):
 
         self.bind('<Escape>', lambda e: self.destroy())
 
+        self.vista.centrar(self.coord_jugador)
         self.actualizar_vista()
 
     def mover(self, df, dc):
         coord_nueva = self.mapa.trasladar_coord(self.coord_jugador, df, dc)
         if self.mapa.celda_bloqueada(coord_nueva):
             return
+        anterior = self.coord_jugador
         self.coord_jugador = coord_nueva
-        self.actualizar_vista()
+        self.vista.centrar(self.coord_jugador)
+        # Sólo pueden cambiar las celdas alrededor de la posición anterior y
+        # de la nueva.
+        self.actualizar_vista(self.celdas_cercanas(anterior) + self.celdas_cercanas(coord_nueva))
 
-    def actualizar_vista(self):
-        self.vista.actualizar(self.obtener_color_celda)
+    def celdas_cercanas(self, coord):
+        f, c = coord
+        return [self.mapa.coord(f + df, c + dc) for df, dc in ESTENCIL_NIEBLA]
+
+    def actualizar_vista(self, coords=None):
+        self.vista.actualizar(self.obtener_color_celda, coords)
 
     def obtener_color_celda(self, mapa, coord):
         return Color.con_niebla(mapa, coord, self.coord_jugador)
@@ -221,38 +980,222 @@ class ModoIA(tk.Toplevel):
 
         self.resizable(False, False)
 
-        self.title("TP3 - Backtracking")
+        self.title(f"TP3 - {editor.solucionador.get()}")
 
-        self.vista = Vista(self, editor.mapa)
+        # La IA avanza en otro hilo (ver avanzar_en_hilo). El cerrojo se
+        # toma para avanzar y para dibujar (también al desplazar o hacer zoom
+        # en la vista), así nunca se dibuja una IA a mitad de un paso.
+        self.cerrojo = threading.Lock()
+        self.vista = Vista(self, editor.mapa, cerrojo=self.cerrojo)
         self.vista.grid()
 
-        self.ia = IA(editor.mapa)
+        self.solucionador = editor.solucionador.get()
+        self.ia = SOLUCIONADORES[self.solucionador](editor.mapa)
+        # La solución se guarda con la clave del mapa tal como estaba al abrir
+        self.soluciones = editor.soluciones
+        self.clave = self.soluciones.clave(editor.mapa, self.solucionador)
+
+        self.pasos = tk.IntVar()
+        self.pasos.set(1)
+        self.adaptativo = tk.BooleanVar()
+        self.adaptativo.set(False)
+
+        panel = tk.Frame(self)
+        panel.grid(row=2, column=0, sticky="we", padx=5, pady=5)
+        tk.Label(panel, text="Pasos por cuadro").grid(row=0, column=0, padx=(0, 5))
+        tk.Spinbox(panel, textvariable=self.pasos, from_=1, to=1000000, width=8).grid(row=0, column=1)
+        tk.Checkbutton(panel, text="Adaptativo", variable=self.adaptativo).grid(row=0, column=2, padx=5)
+        tk.Button(panel, text="Resolver", command=self.resolver).grid(row=0, column=3)
 
         self.bind('<Escape>', lambda e: self.destroy())
 
+        self.usar_ia(self.ia)
+
+        self.vista.centrar(self.ia.coord_jugador())
+        self.ia.cambios()
         self.actualizar_vista()
-        self.esperar_y_avanzar()
 
-    def esperar_y_avanzar(self):
-        self.after(50, self.avanzar)
+        self.pasos_por_lote = 1
+        self.hasta_el_final = False
+        self.tarea = Tarea(self.avanzar_en_hilo())
+        self.after(ESPERA_PASOS_MS, self.revisar_avance)
 
-    def avanzar(self):
-        self.ia.avanzar()
-        self.actualizar_vista()
-        self.esperar_y_avanzar()
+    def destroy(self):
+        self.tarea.cancelar()
+        super().destroy()
 
-    def actualizar_vista(self):
+    def usar_ia(self, ia):
+        self.ia = ia
+        # Color.backtracking sólo pregunta si una celda está en visitados o en
+        # camino, así que se le pasan consultas a la IA en lugar de conjuntos.
+        self.visitados = Pertenencia(ia.visitada)
+        self.camino = Pertenencia(ia.en_camino)
+
+    def pasos_por_cuadro(self):
+        try:
+            return max(1, self.pasos.get())
+        except tk.TclError:
+            return 1
+
+    def avanzar_en_hilo(self):
+        """Avanza la IA de a ``pasos_por_lote`` pasos, esperando
+        ESPERA_PASOS_MS entre un lote y el siguiente (o de a
+        PASOS_POR_LOTE_RESOLVER pasos, sin esperas, si se pidió resolver).
+        Corre en otro hilo: no usa Tk. Genera la duración de cada lote."""
+        while True:
+            inicio = time.perf_counter()
+            with self.cerrojo:
+                if self.ia.terminado():
+                    return
+                if self.hasta_el_final:
+                    # Puede no registrar qué celdas cambiaron (ver cambios())
+                    avanzar_pasos(self.ia, PASOS_POR_LOTE_RESOLVER)
+                else:
+                    # De a un paso, para redibujar sólo las celdas que
+                    # cambiaron
+                    for _ in range(self.pasos_por_lote):
+                        if self.ia.terminado():
+                            break
+                        self.ia.avanzar()
+            yield time.perf_counter() - inicio
+            if not self.hasta_el_final:
+                time.sleep(ESPERA_PASOS_MS / 1000)
+
+    def revisar_avance(self):
+        """Dibuja lo que avanzó la IA desde la última vez, y vuelve a
+        programarse hasta que la IA termina."""
+        if self.tarea.cancelada.is_set():
+            # Se cerró la ventana
+            return
+        duraciones = self.tarea.recibir()
+        if duraciones and self.adaptativo.get():
+            self.ajustar_pasos(duraciones[-1])
+        self.pasos_por_lote = self.pasos_por_cuadro()
+        if self.tarea.terminada:
+            with self.cerrojo:
+                self.mostrar_avance()
+                self.soluciones.guardar(self.ia, self.clave)
+            return
+        # Si la IA está a mitad de un lote, se dibuja en el próximo cuadro
+        if self.cerrojo.acquire(blocking=False):
+            try:
+                self.mostrar_avance()
+            finally:
+                self.cerrojo.release()
+        self.after(int(DURACION_CUADRO * 1000), self.revisar_avance)
+
+    def ajustar_pasos(self, duracion):
+        """Ajusta los pasos por cuadro para que cada lote tarde alrededor de
+        DURACION_CUADRO segundos (a lo sumo duplicándolos o reduciéndolos a
+        la mitad cada vez)."""
+        pasos = self.pasos_por_cuadro()
+        factor = DURACION_CUADRO / duracion if duracion > 0 else 2
+        self.pasos.set(max(1, int(pasos * min(2, max(0.5, factor)))))
+
+    def resolver(self):
+        """Avanza la IA hasta que termina y muestra el resultado. Si el mapa
+        ya se había resuelto con el mismo solucionador, muestra esa solución
+        sin volver a buscarla."""
+        solucion = self.soluciones.obtener(self.ia.mapa, self.solucionador, self.clave)
+        if solucion is None:
+            self.hasta_el_final = True
+            return
+        with self.cerrojo:
+            # La Solucion ya está terminada: el hilo termina en el próximo lote
+            self.usar_ia(solucion)
+            self.mostrar_avance()
+
+    def mostrar_avance(self):
+        self.vista.centrar(self.ia.coord_jugador())
+        self.actualizar_vista(self.ia.cambios())
+
+    def actualizar_vista(self, coords=None):
         coord_jugador = self.ia.coord_jugador()
-        visitados = set(self.ia.visitados())
-        camino = set(self.ia.camino())
 
         def obtener_color_celda(mapa, coord):
-            return Color.backtracking(mapa, coord, coord_jugador, visitados, camino)
+            return Color.backtracking(mapa, coord, coord_jugador, self.visitados, self.camino)
+
+        self.vista.actualizar(obtener_color_celda, coords)
+
+class ModoCarrera(tk.Toplevel):
+    # Pasos que avanza cada agente por cuadro
+    PASOS_POR_CUADRO = 10
+
+    def __init__(self, editor):
+        """Constructor.
+
+        Todos los agentes (ver carrera.agentes_por_defecto) corren sobre el
+        mapa del editor, que no se puede editar mientras tanto, y se dibujan
+        en una única vista: en cada cuadro sólo se redibujan las celdas por
+        donde pasaron los agentes.
+        """
+        super().__init__(editor)
+
+        self.resizable(False, False)
+
+        self.title("TP3 - Carrera")
+
+        self.mapa = editor.mapa
+        self.vista = Vista(self, self.mapa)
+        self.vista.grid()
+
+        self.carrera = Carrera(self.mapa, agentes_por_defecto(self.mapa))
+        self.colores = [Color.AGENTES[k % len(Color.AGENTES)] for k in range(len(self.carrera.agentes))]
+
+        self.pasos = tk.IntVar()
+        self.pasos.set(ModoCarrera.PASOS_POR_CUADRO)
+
+        panel = tk.Frame(self)
+        panel.grid(row=0, column=2, rowspan=2, sticky="ns", padx=5, pady=5)
+        tk.Label(panel, text="Pasos por cuadro").grid(row=0, column=0, sticky="w")
+        tk.Spinbox(panel, textvariable=self.pasos, from_=1, to=1000000, width=8).grid(row=1, column=0, sticky="w")
+        self.resultados = tk.Listbox(panel, width=28, height=len(self.colores))
+        self.resultados.grid(row=2, column=0, sticky="ns", pady=(5, 0))
+        panel.rowconfigure(2, weight=1)
+
+        self.bind('<Escape>', lambda e: self.destroy())
+
+        self.actualizar_vista()
+        self.mostrar_resultados()
+        self.after(int(DURACION_CUADRO * 1000), self.avanzar)
+
+    def pasos_por_cuadro(self):
+        try:
+            return max(1, self.pasos.get())
+        except tk.TclError:
+            return 1
+
+    def avanzar(self):
+        """Avanza todos los agentes y redibuja sólo las celdas donde
+        estaban y donde quedaron. Se vuelve a programar hasta que terminan
+        todos."""
+        cambiadas = self.carrera.avanzar(self.pasos_por_cuadro())
+        self.actualizar_vista(cambiadas)
+        self.mostrar_resultados()
+        if not self.carrera.terminada():
+            self.after(int(DURACION_CUADRO * 1000), self.avanzar)
+
+    def actualizar_vista(self, coords=None):
+        # Si hay varios agentes en una celda, se ve el color del primero
+        ocupadas = {}
+        for coord, color in zip(self.carrera.coords, self.colores):
+            ocupadas.setdefault(coord, color)
+
+        def obtener_color_celda(mapa, coord):
+            return Color.carrera(mapa, coord, ocupadas)
+
+        self.vista.actualizar(obtener_color_celda, coords)
 
-        self.vista.actualizar(obtener_color_celda)
+    def mostrar_resultados(self):
+        colores = dict(zip(self.carrera.nombres, self.colores))
+        self.resultados.delete(0, "end")
+        for k, (nombre, pasos, termino, llego) in enumerate(self.carrera.resultados()):
+            estado = "llegó" if llego else "sin salida" if termino else ""
+            self.resultados.insert("end", f"{nombre}: {pasos} {estado}")
+            self.resultados.itemconfigure(k, foreground=colores[nombre])
 
 def main():
-    #sys.setrecursionlimit(5000)
     Editor().mainloop()
 
-main()
+if __name__ == '__main__':
+    main()